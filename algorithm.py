@@ -2,17 +2,33 @@ import random
 import numpy as np
 from time import time
 from deap import base, creator, tools
+from scipy.optimize import minimize
 
 from surface import Surface
 from camera import Camera
-from scene import SceneProcessor, PolyData
+from scene import SceneProcessor, Objective, TraceRecord
+from wedges import regions_envelope
 
 
 class GeneticAlgorithm:
-    def __init__(self, surface: Surface, d_region: tuple, cameras: list[Camera], generation_config: dict):
+    def __init__(self, surface: Surface, d_region, cameras: list[Camera], generation_config: dict,
+                 d_regions: list = None, region_weights: list[float] = None):
         self._surface = surface
+        self._generation_config = generation_config
 
+        # with d_regions, layouts are scored by a weighted sum of the areas covered in every region
         self._d_region = d_region
+        self._d_regions = d_regions
+        self._region_weights = region_weights
+        if d_regions is not None:
+            assert d_region is None, 'Either a single d_region or a list of d_regions can be given, not both.'
+            if region_weights is None:
+                self._region_weights = [1.0 for _ in d_regions]
+            assert len(self._region_weights) == len(d_regions), 'Every region has to have a weight.'
+            self._scene_region = regions_envelope(d_regions)
+        else:
+            assert region_weights is None, 'Region weights can only be given together with d_regions.'
+            self._scene_region = d_region
         self._cameras = cameras
 
         self._gen_current = 0
@@ -26,9 +42,14 @@ class GeneticAlgorithm:
         self._size_elite = generation_config['size_elite']
         self._size_plebs = generation_config['size_plebs']
         self._error_rate = generation_config['error_rate']
+        self._objective = generation_config.get('objective', Objective.SUM)
+        self._memetic_period = generation_config.get('memetic_period', 0)
+        self._memetic_elites = generation_config.get('memetic_elites', 1)
+        self._memetic_budget = generation_config.get('memetic_budget', 50)
 
         loops = np.identity(len(self._cameras), dtype=np.float32)
         self._loops = loops * (self._min_distance + self._error_rate)
+        self._min_spacing = self._min_distance + self._error_rate
 
         self.__register_methods()
 
@@ -45,7 +66,39 @@ class GeneticAlgorithm:
         self._toolbox.register(alias='evaluate', function=self.evaluate)
         self._toolbox.register(alias='select', function=self.select)
 
+        if not self._use_soft_penalty:
+            self._toolbox.decorate('mate', self.__repair_offspring)
+            self._toolbox.decorate('mutate', self.__repair_offspring)
+
         self._population = None
+        self._evaluations = 0
+        self._refine_evaluations = 0
+        self._history = []
+        self._recorder = None
+
+    def register_map(self, map_function):
+        self._toolbox.register(alias='map', function=map_function)
+
+    def get_evaluation_spec(self):
+        # everything besides the scenario that evaluate() depends on, remote evaluators are built from it
+        return {
+            'd_region': self._d_region,
+            'd_regions': self._d_regions,
+            'region_weights': self._region_weights,
+            'generation_config': self._generation_config
+        }
+
+    def register_recorder(self, recorder):
+        self._recorder = recorder
+
+    def get_evaluations_count(self):
+        return self._evaluations
+
+    def get_refine_evaluations_count(self):
+        return self._refine_evaluations
+
+    def get_history(self):
+        return self._history
 
     @staticmethod
     def __to_apply(probability):
@@ -62,13 +115,59 @@ class GeneticAlgorithm:
     def __has_penalty(self, distances):
         return np.any(self._loops + distances < self._min_distance)
 
+    def __get_distances(self, x_cameras):
+        lengths = self._surface.arc_length_at(x_cameras)
+        return np.abs(lengths[:, None] - lengths[None, :])
+
+    def __get_arc_length_slack(self):
+        left, right = self._surface.get_surface_bounds()
+        length_left, length_right = self._surface.arc_length_at([left, right])
+        slack = (length_right - length_left) - (len(self._cameras) - 1) * self._min_spacing
+        return length_left, length_right, slack
+
+    def __repair_offspring(self, variation):
+        def wrapper(*args, **kwargs):
+            offspring = variation(*args, **kwargs)
+            for child in offspring:
+                self.repair(child)
+            return offspring
+        return wrapper
+
     def generate_initial_individual(self):
         left, right = self._surface.get_surface_bounds()
         amount = len(self._cameras)
-        coordinates = [random.uniform(left, right) for _ in range(amount)]
+
+        coordinates = None
+        if not self._use_soft_penalty:
+            coordinates = self._surface.sample_spaced_points(amount, self._min_spacing)
+        if coordinates is None:
+            coordinates = [random.uniform(left, right) for _ in range(amount)]
+
         random.shuffle(coordinates)
         return creator.Individual(coordinates)
 
+    def repair(self, individual):
+        length_left, length_right, slack = self.__get_arc_length_slack()
+        if slack < 0.0:
+            return individual
+
+        lengths = self._surface.arc_length_at(individual[:])
+        order = np.argsort(lengths)
+        repaired = lengths[order]
+
+        for k in range(1, len(repaired)):
+            repaired[k] = max(repaired[k], repaired[k - 1] + self._min_spacing)
+        repaired[-1] = min(repaired[-1], length_right)
+        for k in range(len(repaired) - 2, -1, -1):
+            repaired[k] = min(repaired[k], repaired[k + 1] - self._min_spacing)
+
+        moved = repaired != lengths[order]
+        if np.any(moved):
+            x_repaired = self._surface.x_at_arc_length(repaired[moved])
+            for idx, x in zip(order[moved], x_repaired):
+                individual[idx] = float(x)
+        return individual
+
     def mutate_dynamic(self, individual):
         progress = self._gen_current / self._gen_count
 
@@ -109,8 +208,7 @@ class GeneticAlgorithm:
                     individual1[i], individual2[i] = individual2[i], individual1[i]
         return individual1, individual2
 
-    def evaluate(self, individual):
-        x_cameras = individual[:]
+    def __process_scene(self, x_cameras):
         y_cameras = self._surface.get_function_values(x_cameras)
         n_cameras = self._surface.normal_at_point(x_cameras)
 
@@ -122,22 +220,56 @@ class GeneticAlgorithm:
 
         scene_proc = SceneProcessor(
             surface=self._surface, cameras=self._cameras,
-            d_region=self._d_region, approximation_count=self._approx_count
+            d_region=self._scene_region, approximation_count=self._approx_count
         )
+        scene_proc.trace_scene_rays(record=TraceRecord.NONE)
+        return scene_proc
+
+    def get_coverage(self, individual):
+        return self.__process_scene(individual[:]).crop_region_batch()
 
-        distances = scene_proc.get_distances_between_cameras()
+    def evaluate(self, individual):
+        x_cameras = individual[:]
+
+        distances = self.__get_distances(x_cameras)
         if self._use_soft_penalty:
             penalty = self.__calculate_penalty(distances)
+        elif self.__has_penalty(distances):
+            return float('-inf'),
         else:
-            penalty = float('inf') if self.__has_penalty(distances) else 0.0
+            penalty = 0.0
 
-        scene_proc.trace_scene_rays()
-        scene_cropped_wedges = scene_proc.crop_region()
-        scene_total_area = scene_cropped_wedges[PolyData.AREA]
+        scene_proc = self.__process_scene(x_cameras)
+        if self._d_regions is None:
+            scene_total_area = scene_proc.get_covered_area(objective=self._objective)
+        else:
+            regions_areas = scene_proc.get_covered_areas(self._d_regions, objective=self._objective)
+            scene_total_area = float(np.dot(self._region_weights, regions_areas))
 
         score = scene_total_area - self._w_penalty * penalty
         return score,
 
+    def refine(self, individual):
+        left, right = self._surface.get_surface_bounds()
+        evaluations = 0
+
+        def objective(x_cameras):
+            nonlocal evaluations
+            evaluations += 1
+            fitness, = self.evaluate(x_cameras.tolist())
+            return -fitness
+
+        result = minimize(
+            objective, x0=np.asarray(individual[:], dtype=np.float64), method='Nelder-Mead',
+            bounds=[(float(left), float(right))] * len(self._cameras),
+            options={'maxfev': self._memetic_budget, 'xatol': self._error_rate, 'fatol': self._error_rate}
+        )
+
+        if -result.fun > individual.fitness.values[0]:
+            individual[:] = result.x.tolist()
+            individual.fitness.values = -result.fun,
+        return evaluations
+
     def select(self, population):
         elite = tools.selBest(population, k=self._size_elite)
         rest = [ind for ind in population if ind not in elite]
@@ -150,6 +282,11 @@ class GeneticAlgorithm:
         best_fit = float('-inf')
         best_ind = None
 
+        self._evaluations = 0
+        self._refine_evaluations = 0
+        self._history = []
+        t_start = time()
+
         for self._gen_current in range(1, self._gen_count + 1):
             print(f'Generation\t{self._gen_current}/{self._gen_count}')
 
@@ -169,12 +306,20 @@ class GeneticAlgorithm:
                     self._toolbox.mutate(mutant)
                     del mutant.fitness.values
 
-            for candidate in offspring:
-                if not candidate.fitness.valid:
-                    candidate.fitness.values = self._toolbox.evaluate(candidate)
+            candidates = [candidate for candidate in offspring if not candidate.fitness.valid]
+            fitnesses = self._toolbox.map(self._toolbox.evaluate, candidates)
+            for candidate, fitness in zip(candidates, fitnesses):
+                candidate.fitness.values = fitness
+            self._evaluations += len(candidates)
 
             self._population[:] = offspring
 
+            if self._memetic_period > 0 and self._gen_current % self._memetic_period == 0:
+                for elite in tools.selBest(self._population, k=self._memetic_elites):
+                    refine_evaluations = self.refine(elite)
+                    self._evaluations += refine_evaluations
+                    self._refine_evaluations += refine_evaluations
+
             fits = [ind.fitness.values[0] for ind in self._population]
             max_fit = max(fits)
             avg_fit = sum(fits) / len(fits)
@@ -185,10 +330,19 @@ class GeneticAlgorithm:
 
             t_after = time()
             t_elapsed = t_after - t_before
+            self._history.append((self._gen_current, self._evaluations, max_fit, best_fit, t_after - t_start))
+            if self._recorder is not None:
+                self._recorder.append_generation(
+                    self._gen_current, self._evaluations, t_after - t_start, max_fit, best_fit, best_ind,
+                    [ind[:] for ind in self._population], fits
+                )
 
             print(f'\tmax-fit={max_fit}\t\tavg-fit={avg_fit}')
             print(f'\tbest-fit={best_fit}\t\tbest-ind={best_ind}')
             print(f'\ttime-elapsed={t_elapsed} sec')
             print()
 
+        if self._recorder is not None and best_ind is not None:
+            self._recorder.append_coverage(self._gen_current, best_ind, best_fit, self.get_coverage(best_ind))
+
         return best_ind, best_fit
@@ -2,23 +2,23 @@ import numpy as np
 
 
 class Camera:
-    def __init__(self, fov_rad, res_pix):
+    def __init__(self, fov_rad, res_pix, rays=None):
         self._rotation = 0.0
         self._location = 0.0, 0.0
 
         self._fov = fov_rad
         self._angle_res = self._fov / res_pix
-        self._rays = []
-
-        for i in range(1 + res_pix):
-            ray_vector = np.asarray([1.0, 0.0])
-            ray_angle = i * self._angle_res - self._fov / 2.0
-            rot_matrix = np.asarray([
-                [np.cos(ray_angle), -np.sin(ray_angle)],
-                [np.sin(ray_angle), np.cos(ray_angle)]
-            ])
-            ray_vector = rot_matrix @ ray_vector
-            self._rays.append(ray_vector)
+
+        if rays is None:
+            ray_angles = np.arange(1 + res_pix) * self._angle_res - self._fov / 2.0
+            rays = np.asarray([np.cos(ray_angles), np.sin(ray_angles)]).T
+        self._rays = rays
+
+    def get_fov(self):
+        return self._fov
+
+    def get_base_rays(self):
+        return self._rays
 
     def rotate(self, angle_rad):
         self._rotation = angle_rad
@@ -30,12 +30,8 @@ class Camera:
         return self._rotation, self._location
 
     def get_rays(self):
-        res_rays = []
-        for ray in self._rays:
-            matrix = np.array([
-                [np.cos(self._rotation), -np.sin(self._rotation)],
-                [np.sin(self._rotation), np.cos(self._rotation)]
-            ])
-            res_ray = matrix @ ray + self._location
-            res_rays.append(res_ray)
-        return np.asarray(res_rays)
+        matrix = np.array([
+            [np.cos(self._rotation), -np.sin(self._rotation)],
+            [np.sin(self._rotation), np.cos(self._rotation)]
+        ])
+        return self._rays @ matrix.T + np.asarray(self._location)
@@ -0,0 +1,230 @@
+import queue
+import threading
+from functools import partial
+from time import time
+from pathlib import Path
+from multiprocessing import Process
+from multiprocessing.connection import Listener, Client
+
+from algorithm import GeneticAlgorithm
+from scenario import read_scenario_header, check_scenario_sources, load_compiled_scenario
+
+
+class EvaluationJob:
+    def __init__(self, batches):
+        self.results = [None] * len(batches)
+        self.retries = [0] * len(batches)
+        self.error = None
+        self._remaining = len(batches)
+        self._condition = threading.Condition()
+
+    def complete(self, batch_idx, fitnesses):
+        with self._condition:
+            if self.results[batch_idx] is None:
+                self.results[batch_idx] = fitnesses
+                self._remaining -= 1
+            self._condition.notify_all()
+
+    def fail(self, error):
+        with self._condition:
+            self.error = error
+            self._condition.notify_all()
+
+    def wait(self, timeout=None):
+        with self._condition:
+            return self._condition.wait_for(lambda: self._remaining == 0 or self.error is not None, timeout)
+
+    def get_results(self):
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return [fitness for batch_fitnesses in self.results for fitness in batch_fitnesses]
+
+
+class EvaluationCoordinator:
+    def __init__(self, address, authkey: bytes, scenario_path: Path, evaluation_spec: dict,
+                 batch_size=8, max_retries=3, worker_timeout=600.0, registration_timeout=60.0):
+        self._address = address
+        self._authkey = authkey
+        check_scenario_sources(scenario_path)
+        self._registration = {
+            'scenario_path': str(scenario_path),
+            'scenario_hash': read_scenario_header(scenario_path)['source_hash'],
+            'evaluation_spec': evaluation_spec
+        }
+        self._batch_size = batch_size
+        self._max_retries = max_retries
+        self._worker_timeout = worker_timeout
+        self._registration_timeout = registration_timeout
+
+        self._tasks = queue.Queue()
+        self._workers = []
+        self._workers_lock = threading.Lock()
+        self._listener = None
+        self._closed = False
+
+    def start(self):
+        self._listener = Listener(self._address, authkey=self._authkey)
+        self._address = self._listener.address
+        threading.Thread(target=self.__accept_workers, daemon=True).start()
+        return self._address
+
+    def get_address(self):
+        return self._address
+
+    def get_workers_count(self):
+        with self._workers_lock:
+            return len(self._workers)
+
+    def __accept_workers(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closed:
+                    break
+                continue
+
+            if self._closed:
+                conn.close()
+                break
+
+            try:
+                conn.send(self._registration)
+                reply = conn.recv()
+            except (OSError, EOFError):
+                conn.close()
+                continue
+
+            if not reply.get('ready', False):
+                print(f'Worker rejected registration: {reply.get("error")}')
+                conn.close()
+                continue
+
+            with self._workers_lock:
+                self._workers.append(conn)
+            threading.Thread(target=self.__serve_worker, args=(conn, ), daemon=True).start()
+
+    def __serve_worker(self, conn):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            job, batch_idx, individuals = task
+            if job.error is not None:
+                # batches of a failed job are dropped instead of being evaluated for nothing
+                continue
+
+            try:
+                conn.send((batch_idx, individuals))
+                if not conn.poll(self._worker_timeout):
+                    raise TimeoutError(f'Worker did not answer in {self._worker_timeout} sec.')
+                result_idx, fitnesses = conn.recv()
+                assert result_idx == batch_idx, 'Worker answered a different batch.'
+            except (OSError, EOFError, TimeoutError, AssertionError):
+                self.__retry(job, batch_idx, individuals)
+                break
+
+            job.complete(batch_idx, fitnesses)
+
+        with self._workers_lock:
+            if conn in self._workers:
+                self._workers.remove(conn)
+        conn.close()
+
+    def __retry(self, job, batch_idx, individuals):
+        job.retries[batch_idx] += 1
+        if job.retries[batch_idx] > self._max_retries:
+            job.fail(f'Batch {batch_idx} failed on {job.retries[batch_idx]} workers.')
+        else:
+            self._tasks.put((job, batch_idx, individuals))
+
+    def __check_function(self, function):
+        # workers evaluate with their own GeneticAlgorithm built from the evaluation spec, so only the evaluate
+        # of a solver with the very same spec can be mapped
+        evaluate = function.func if isinstance(function, partial) else function
+        solver = getattr(evaluate, '__self__', None)
+        assert isinstance(solver, GeneticAlgorithm) and evaluate.__func__ is GeneticAlgorithm.evaluate, \
+            'Only GeneticAlgorithm.evaluate can be mapped to the evaluation workers.'
+        assert solver.get_evaluation_spec() == self._registration['evaluation_spec'], \
+            'The solver evaluation spec differs from the one the coordinator was set up with.'
+
+    def map(self, function, individuals):
+        self.__check_function(function)
+        individuals = [list(ind) for ind in individuals]
+        if len(individuals) == 0:
+            return []
+
+        batches = [
+            individuals[idx:idx + self._batch_size]
+            for idx in range(0, len(individuals), self._batch_size)
+        ]
+        job = EvaluationJob(batches)
+        for batch_idx, batch in enumerate(batches):
+            self._tasks.put((job, batch_idx, batch))
+
+        # without any registered worker the job fails after registration_timeout instead of waiting forever
+        idle_since = None
+        while not job.wait(timeout=min(1.0, self._registration_timeout)):
+            if self.get_workers_count() > 0:
+                idle_since = None
+            elif idle_since is None:
+                idle_since = time()
+            elif time() - idle_since > self._registration_timeout:
+                job.fail(f'No worker was registered for {self._registration_timeout} sec.')
+        return job.get_results()
+
+    def close(self):
+        self._closed = True
+        with self._workers_lock:
+            workers_count = len(self._workers)
+        for _ in range(workers_count):
+            self._tasks.put(None)
+
+        if self._listener is not None:
+            try:
+                Client(self._address, authkey=self._authkey).close()
+            except OSError:
+                pass
+            self._listener.close()
+
+
+def run_evaluation_worker(address, authkey: bytes, scenario_path: Path = None):
+    conn = Client(address, authkey=authkey)
+    registration = conn.recv()
+
+    if scenario_path is None:
+        scenario_path = Path(registration['scenario_path'])
+    # the coordinator checked the scenario against its source configs, the hash comparison below ties the
+    # worker's copy to it, so remote workers do not need the configs themselves
+    scenario = load_compiled_scenario(scenario_path, check_sources=False)
+
+    if scenario.get_hash() != registration['scenario_hash']:
+        conn.send({'ready': False, 'error': f'scenario {str(scenario_path)} hash mismatch'})
+        conn.close()
+        return
+
+    solver = GeneticAlgorithm(
+        surface=scenario.get_surface(), cameras=scenario.get_cameras(), **registration['evaluation_spec']
+    )
+    conn.send({'ready': True})
+
+    while True:
+        try:
+            message = conn.recv()
+        except (OSError, EOFError):
+            break
+
+        batch_idx, individuals = message
+        fitnesses = [solver.evaluate(ind) for ind in individuals]
+        conn.send((batch_idx, fitnesses))
+
+    conn.close()
+
+
+def start_local_workers(address, authkey: bytes, workers_count: int):
+    workers = []
+    for _ in range(workers_count):
+        worker = Process(target=run_evaluation_worker, args=(address, authkey), daemon=True)
+        worker.start()
+        workers.append(worker)
+    return workers
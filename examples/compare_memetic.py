@@ -0,0 +1,42 @@
+import random
+from pathlib import Path
+
+from algorithm import GeneticAlgorithm
+from sweep import evaluations_saved
+from tools import create_surface_from_config, create_region_from_config,\
+    create_camera_from_config, load_algorithm_config
+
+
+if __name__ == '__main__':
+    storage_path = Path('../data')
+    conf_surf = storage_path / 'surface.json'
+    conf_region = storage_path / 'region.json'
+    conf_cam_list = [
+        storage_path / 'camera_1.json',
+        storage_path / 'camera_2.json',
+        storage_path / 'camera_3.json'
+    ]
+    conf_alg = storage_path / 'algorithm_params.json'
+
+    seed = 0
+    memetic_conf = {'memetic_period': 5, 'memetic_elites': 2, 'memetic_budget': 40}
+
+    surface = create_surface_from_config(conf_surf)
+    d_region = create_region_from_config(conf_region)
+    cameras = [create_camera_from_config(conf_cam) for conf_cam in conf_cam_list]
+    gen_conf = load_algorithm_config(conf_alg)
+
+    histories = []
+    for run_conf in [gen_conf, {**gen_conf, **memetic_conf}]:
+        random.seed(seed)
+        solver = GeneticAlgorithm(
+            surface=surface, d_region=d_region, cameras=cameras, generation_config=run_conf
+        )
+        x_coordinates, res_fitness = solver.process()
+        histories.append(solver.get_history())
+        print(f'Results: coordinates={x_coordinates}\tarea={res_fitness}\t'
+              f'evaluations={solver.get_evaluations_count()}\trefine={solver.get_refine_evaluations_count()}')
+
+    target_fitness, plain_evaluations, memetic_evaluations, saved = evaluations_saved(*histories)
+    print(f'Target fitness {target_fitness}: plain GA {plain_evaluations} evaluations, '
+          f'memetic GA {memetic_evaluations} evaluations, saved {saved}')
@@ -0,0 +1,28 @@
+from time import time
+from pathlib import Path
+
+from scenario import compile_scenario, load_compiled_scenario
+
+
+if __name__ == '__main__':
+    storage_path = Path('../data')
+    conf_surf = storage_path / 'surface.json'
+    conf_region = storage_path / 'region.json'
+    conf_cam_list = [
+        storage_path / 'camera_1.json',
+        storage_path / 'camera_2.json',
+        storage_path / 'camera_3.json'
+    ]
+    compiled_path = storage_path / 'scenario.bin'
+
+    source_hash = compile_scenario(conf_surf, conf_region, conf_cam_list, compiled_path)
+    print(f'Compiled scenario {compiled_path} from configs with hash {source_hash}')
+
+    t_before = time()
+    scenario = load_compiled_scenario(compiled_path, config_paths=[conf_surf, conf_region, *conf_cam_list])
+    t_after = time()
+
+    surface = scenario.get_surface()
+    print(f'Loaded in {t_after - t_before} sec')
+    print(f'Surface bounds: {surface.get_surface_bounds()}\tregion: {scenario.get_region()}')
+    print(f'Cameras: {len(scenario.get_cameras())}')
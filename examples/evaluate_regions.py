@@ -0,0 +1,35 @@
+import numpy as np
+from pathlib import Path
+
+from scene import SceneProcessor, Objective, TraceRecord
+from tools import create_surface_from_config, create_regions_from_config, create_camera_from_config
+
+
+if __name__ == '__main__':
+    storage_path = Path('../data')
+    conf_surf = storage_path / 'surface.json'
+    conf_regions = storage_path / 'regions.json'
+    conf_cam_list = [
+        storage_path / 'camera_1.json',
+        storage_path / 'camera_2.json',
+        storage_path / 'camera_3.json'
+    ]
+
+    surface = create_surface_from_config(conf_surf)
+    d_regions, weights = create_regions_from_config(conf_regions)
+    cameras = [create_camera_from_config(conf_cam) for conf_cam in conf_cam_list]
+
+    x_cameras = [2.7728794, 9.151186, 5.626387]
+    y_cameras = surface.get_function_values(x_cameras)
+    n_cameras = surface.normal_at_point(x_cameras)
+    for cam, x, y, n in zip(cameras, x_cameras, y_cameras, n_cameras):
+        cam.rotate(np.atan2(n[1], n[0]))
+        cam.translate(np.asarray([x, y]))
+
+    scene_proc = SceneProcessor(surface=surface, cameras=cameras, d_region=d_regions[0], approximation_count=10)
+    scene_proc.trace_scene_rays(record=TraceRecord.NONE)
+    regions_areas = scene_proc.get_covered_areas(d_regions, objective=Objective.UNION)
+
+    for d_region, weight, area in zip(d_regions, weights, regions_areas):
+        print(f'Region {d_region}: weight={weight}\tcovered area={area}')
+    print(f'Weighted covered area: {np.dot(weights, regions_areas)}')
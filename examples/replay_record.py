@@ -0,0 +1,64 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from pathlib import Path
+from matplotlib.patches import Polygon, Rectangle
+
+from recording import load_run_record
+from wedges import PolyData
+from tools import create_surface_from_config, create_region_from_config
+
+
+if __name__ == '__main__':
+    storage_path = Path('../data')
+    record_path = storage_path / 'run_record.bin'
+
+    surface = create_surface_from_config(storage_path / 'surface.json')
+    d_region = create_region_from_config(storage_path / 'region.json')
+
+    run_record = load_run_record(record_path)
+    generations = run_record.get_generations()
+    print(f'Generations: {run_record.get_generations_count()}\tcoverages: {len(run_record.get_coverages())}')
+
+    fig = plt.figure(dpi=100, figsize=(14, 7))
+
+    # fitness curves and per-generation population positions are sliced straight from the memory-mapped file
+    ax_fit = fig.add_subplot(1, 2, 1)
+    ax_fit.plot(generations['evaluations'], generations['max_fitness'], c='green', label='Max fitness')
+    ax_fit.plot(generations['evaluations'], generations['best_fitness'], c='blue', label='Best fitness')
+    ax_fit.set_xlabel('Evaluations')
+    ax_fit.legend()
+
+    surface_left, surface_right = surface.get_surface_bounds()
+    X = np.linspace(surface_left, surface_right, 100)
+    Y = surface.get_function_values(X)
+
+    ax_scene = fig.add_subplot(1, 2, 2)
+    ax_scene.plot(X, Y, c='grey', label='Surface S(x)')
+    ax_scene.add_patch(Rectangle(
+        (d_region[0][0], d_region[1][0]),
+        width=d_region[0][1] - d_region[0][0],
+        height=d_region[1][1] - d_region[1][0],
+        facecolor='None', edgecolor='red', label='D region'
+    ))
+
+    last_population = generations['population'][-1].ravel()
+    ax_scene.scatter(last_population, surface.get_function_values(last_population), c='grey', s=5.0,
+                     label='Last population')
+
+    if len(run_record.get_coverages()) > 0:
+        coverage = run_record.get_coverages()[-1]
+        points = coverage[PolyData.POINTS]
+        offsets = coverage[PolyData.OFFSETS]
+        colors = plt.get_cmap('tab10')
+
+        for start, stop, idx_cam in zip(offsets[:-1], offsets[1:], coverage[PolyData.CAMERAS]):
+            poly = Polygon(xy=points[start:stop], facecolor=colors(idx_cam), edgecolor='black', alpha=0.5)
+            ax_scene.add_patch(poly)
+
+        x_cameras = coverage['individual']
+        ax_scene.scatter(x_cameras, surface.get_function_values(x_cameras), c='blue', label='Cameras')
+        print(f'Generation {coverage["generation"]}: coordinates={x_cameras.tolist()}\tfitness={coverage["fitness"]}')
+
+    ax_scene.legend()
+    ax_scene.set_aspect('equal')
+    plt.show()
@@ -0,0 +1,48 @@
+import random
+from pathlib import Path
+
+from algorithm import GeneticAlgorithm
+from scenario import compile_scenario, load_compiled_scenario
+from distributed import EvaluationCoordinator, start_local_workers
+from tools import load_algorithm_config
+
+
+if __name__ == '__main__':
+    storage_path = Path('../data')
+    conf_surf = storage_path / 'surface.json'
+    conf_region = storage_path / 'region.json'
+    conf_cam_list = [
+        storage_path / 'camera_1.json',
+        storage_path / 'camera_2.json',
+        storage_path / 'camera_3.json'
+    ]
+    conf_alg = storage_path / 'algorithm_params.json'
+    compiled_path = storage_path / 'scenario.bin'
+
+    workers_count = 4
+    authkey = b'resolution-maximization'
+
+    compile_scenario(conf_surf, conf_region, conf_cam_list, compiled_path)
+    scenario = load_compiled_scenario(compiled_path)
+    gen_conf = load_algorithm_config(conf_alg)
+
+    random.seed(0)
+    solver = GeneticAlgorithm(
+        surface=scenario.get_surface(), d_region=scenario.get_region(),
+        cameras=scenario.get_cameras(), generation_config=gen_conf
+    )
+
+    coordinator = EvaluationCoordinator(
+        address=('127.0.0.1', 0), authkey=authkey, scenario_path=compiled_path,
+        evaluation_spec=solver.get_evaluation_spec()
+    )
+    address = coordinator.start()
+    workers = start_local_workers(address, authkey, workers_count)
+    solver.register_map(coordinator.map)
+    x_coordinates, res_fitness = solver.process()
+    coordinator.close()
+
+    for worker in workers:
+        worker.join()
+
+    print(f'Results: coordinates={x_coordinates}\tarea={res_fitness}')
@@ -0,0 +1,37 @@
+import random
+from pathlib import Path
+
+from gradient import AreaGradient, GradientOptimizer
+from tools import create_surface_from_config, create_region_from_config,\
+    create_camera_from_config, load_algorithm_config
+
+
+if __name__ == '__main__':
+    storage_path = Path('../data')
+    conf_surf = storage_path / 'surface.json'
+    conf_region = storage_path / 'region.json'
+    conf_cam_list = [
+        storage_path / 'camera_1.json',
+        storage_path / 'camera_2.json',
+        storage_path / 'camera_3.json'
+    ]
+    conf_alg = storage_path / 'algorithm_params.json'
+
+    surface = create_surface_from_config(conf_surf)
+    d_region = create_region_from_config(conf_region)
+    cameras = [create_camera_from_config(conf_cam) for conf_cam in conf_cam_list]
+    gen_conf = load_algorithm_config(conf_alg)
+
+    area_gradient = AreaGradient(
+        surface=surface, d_region=d_region, cameras=cameras,
+        approximation_count=gen_conf['approximation_count'], objective=gen_conf.get('objective', 'sum')
+    )
+    analytic, numeric = area_gradient.check([2.7728794, 9.151186, 5.626387])
+    print(f'Gradient check: analytic={analytic}\tfinite-difference={numeric}')
+    print()
+
+    random.seed(0)
+    solver = GradientOptimizer(surface=surface, d_region=d_region, cameras=cameras, generation_config=gen_conf)
+    x_coordinates, res_fitness = solver.process()
+
+    print(f'Results: coordinates={x_coordinates}\tarea={res_fitness}\tevaluations={solver.get_evaluations_count()}')
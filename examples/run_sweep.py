@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from sweep import SweepRunner, create_sweep_from_config
+from scenario import compile_scenario
+from tools import load_algorithm_config
+
+
+if __name__ == '__main__':
+    storage_path = Path('../data')
+    conf_surf = storage_path / 'surface.json'
+    conf_region = storage_path / 'region.json'
+    conf_cam_list = [
+        storage_path / 'camera_1.json',
+        storage_path / 'camera_2.json',
+        storage_path / 'camera_3.json'
+    ]
+    conf_alg = storage_path / 'algorithm_params.json'
+    conf_sweep = storage_path / 'sweep_params.json'
+    compiled_path = storage_path / 'scenario.bin'
+    cache_path = storage_path / 'sweep_cache'
+    summary_path = storage_path / 'sweep_summary.csv'
+
+    target_fitness = 25.0
+
+    compile_scenario(conf_surf, conf_region, conf_cam_list, compiled_path)
+    gen_conf = load_algorithm_config(conf_alg)
+    overrides, seeds = create_sweep_from_config(conf_sweep)
+
+    runner = SweepRunner(scenario_path=compiled_path, base_config=gen_conf, cache_dir=cache_path)
+    results = runner.run(overrides, seeds)
+    summary = runner.summarize(results, target_fitness=target_fitness)
+    runner.write_summary(summary, summary_path)
+
+    for row in summary:
+        print(row)
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from algorithm import GeneticAlgorithm
+from recording import RunRecorder
 from tools import create_surface_from_config, create_region_from_config,\
     create_camera_from_config, load_algorithm_config
 
@@ -15,6 +16,7 @@ if __name__ == '__main__':
         storage_path / 'camera_3.json'
     ]
     conf_alg = storage_path / 'algorithm_params.json'
+    record_path = storage_path / 'run_record.bin'
 
     surface = create_surface_from_config(conf_surf)
     d_region = create_region_from_config(conf_region)
@@ -24,8 +26,11 @@ if __name__ == '__main__':
     solver = GeneticAlgorithm(
         surface=surface, d_region=d_region, cameras=cameras, generation_config=gen_conf
     )
-    x_coordinates, res_fitness = solver.process()
+    with RunRecorder(record_path, cameras_count=len(cameras), metadata={'generation_config': gen_conf}) as recorder:
+        solver.register_recorder(recorder)
+        x_coordinates, res_fitness = solver.process()
     y_coordinates = surface.get_function_values(x_coordinates)
     res_coordinates = zip(x_coordinates, y_coordinates)
 
-    print(f'Results: coordinates={res_coordinates}\tarea={res_fitness}')
+    print(f'Results: coordinates={list(res_coordinates)}\tarea={res_fitness}')
+    print(f'Run record: {str(record_path)}')
@@ -3,7 +3,7 @@ import matplotlib.pyplot as plt
 from pathlib import Path
 from matplotlib.patches import Wedge, Polygon, Rectangle
 
-from scene import SceneProcessor, PolyData
+from scene import SceneProcessor, PolyData, TraceRecord, Objective
 from tools import create_surface_from_config, create_region_from_config, create_camera_from_config
 
 
@@ -59,16 +59,8 @@ if __name__ == '__main__':
     print('Distances between all cameras:')
     print(distances)
 
-    scene_intersection_points = scene_proc.trace_scene_rays()
-    all_intersection_points = []
-    for cam_inter_p in scene_intersection_points:
-        for ray_inter_p in cam_inter_p:
-            for from_inter_p, to_inter_p in ray_inter_p:
-                if from_inter_p is not None:
-                    all_intersection_points.append(from_inter_p)
-                if to_inter_p is not None:
-                    all_intersection_points.append(to_inter_p)
-    all_intersection_points = np.asarray(all_intersection_points)
+    scene_intersections = scene_proc.trace_scene_rays(record=TraceRecord.COMPACT)
+    all_intersection_points = scene_intersections['hits'][scene_intersections['valid']]
 
     scene_wedges = scene_proc.get_scene_wedges_union()
     scene_sector_angles = scene_proc.get_scene_sectors_angles()
@@ -76,6 +68,7 @@ if __name__ == '__main__':
     scene_cropped_points = scene_cropped_wedges[PolyData.POINTS]
     scene_total_area = scene_cropped_wedges[PolyData.AREA]
     print(f'Total area: {scene_total_area}')
+    print(f'Covered area: {scene_proc.get_covered_area(objective=Objective.UNION)}')
 
     # visualize all
     fig = plt.figure(dpi=100, figsize=(7, 7))
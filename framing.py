@@ -0,0 +1,29 @@
+import json
+from pathlib import Path
+
+
+def align_offset(offset, alignment):
+    return -(-offset // alignment) * alignment
+
+
+def write_header(bin_file, magic: bytes, header: dict, alignment: int):
+    # magic, 8 byte little-endian header length, json header, zero padding up to the aligned data start
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_end = len(magic) + 8 + len(header_bytes)
+    data_start = align_offset(header_end, alignment)
+
+    bin_file.write(magic)
+    bin_file.write(len(header_bytes).to_bytes(8, 'little'))
+    bin_file.write(header_bytes)
+    bin_file.write(bytes(data_start - header_end))
+    return data_start
+
+
+def read_header(file_path: Path, magic: bytes, alignment: int, file_kind: str):
+    with open(str(file_path), 'rb') as bin_file:
+        assert bin_file.read(len(magic)) == magic, f'File {str(file_path)} is not a {file_kind}.'
+        header_size = int.from_bytes(bin_file.read(8), 'little')
+        header = json.loads(bin_file.read(header_size).decode('utf-8'))
+
+    data_start = align_offset(len(magic) + 8 + header_size, alignment)
+    return header, data_start
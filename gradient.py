@@ -0,0 +1,316 @@
+import random
+import numpy as np
+import shapely
+from scipy.optimize import minimize
+
+from surface import Surface
+from camera import Camera
+from scene import SceneProcessor, Objective, TraceRecord, intersect_fov_rays
+from wedges import WedgesCropper, PolyData, union_geometry, cross_2d
+
+
+def _perp(vectors):
+    return np.stack([-vectors[..., 1], vectors[..., 0]], axis=-1)
+
+
+class AreaGradient:
+    def __init__(self, surface: Surface, d_region, cameras: list[Camera], approximation_count: int,
+                 objective=Objective.SUM):
+        self._surface = surface
+        self._d_region = d_region
+        self._cameras = cameras
+        self._approx_count = approximation_count
+        self._objective = objective
+
+        self._wedges_cropper = WedgesCropper(d_region, arc_pts_count=approximation_count)
+
+    def place_cameras(self, x_cameras):
+        x_cameras = np.asarray(x_cameras, dtype=np.float64)
+        y_cameras = self._surface.get_function_values(x_cameras)
+        dy_dx = self._surface.get_1_derivative_values(x_cameras)
+        d2y_dx2 = self._surface.get_2_derivative_values(x_cameras)
+
+        # rotation follows the normal (-y', 1), so d(rotation)/dx = y'' / (1 + y'^2)
+        rotations = np.arctan2(1.0, -dy_dx)
+        for cam, x, y, rot in zip(self._cameras, x_cameras, y_cameras, rotations):
+            cam.rotate(rot)
+            cam.translate(np.asarray([x, y]))
+
+        d_locations = np.stack([np.ones_like(dy_dx), dy_dx], axis=-1)
+        d_rotations = d2y_dx2 / (1.0 + dy_dx ** 2)
+        return d_locations, d_rotations
+
+    def area(self, x_cameras):
+        self.place_cameras(x_cameras)
+        scene_proc = SceneProcessor(
+            surface=self._surface, cameras=self._cameras,
+            d_region=self._d_region, approximation_count=self._approx_count
+        )
+        scene_proc.trace_scene_rays(record=TraceRecord.NONE)
+        return scene_proc.get_covered_area(objective=self._objective)
+
+    def __trace_sector_segments(self, d_locations, d_rotations):
+        amount = len(self._cameras)
+        scene_segments = []
+
+        for a in range(amount):
+            _, loc_a = self._cameras[a].get_transform()
+            fov_rays = self._cameras[a].get_rays() - loc_a
+            fov_norms = np.linalg.norm(fov_rays, axis=1)
+            sectors_segments = [[] for _ in range(len(fov_rays) - 1)]
+
+            for b in range(amount):
+                if a == b:
+                    continue
+
+                _, loc_b = self._cameras[b].get_transform()
+                rays = self._cameras[b].get_rays() - loc_b
+                shift = loc_b - loc_a
+
+                t, safe_det, valid = intersect_fov_rays(loc_a, fov_rays, loc_b, rays)
+
+                # t = cross(shift, ray) / cross(fov_ray, ray), differentiated through both camera poses
+                d_num_a = cross_2d(-d_locations[a], rays)[:, None]
+                d_det_a = cross_2d(_perp(fov_rays)[None, :], rays[:, None]) * d_rotations[a]
+                d_num_b = (cross_2d(d_locations[b], rays) + cross_2d(shift, _perp(rays)) * d_rotations[b])[:, None]
+                d_det_b = cross_2d(fov_rays[None, :], _perp(rays)[:, None]) * d_rotations[b]
+
+                d_radii = np.zeros(shape=t.shape + (amount, ))
+                d_radii[..., a] = (d_num_a - t * d_det_a) / safe_det * fov_norms[None, :]
+                d_radii[..., b] = (d_num_b - t * d_det_b) / safe_det * fov_norms[None, :]
+                radii = t * fov_norms[None, :]
+
+                for idx_sec, segments in enumerate(sectors_segments):
+                    for idx_ray in np.flatnonzero(valid[:, idx_sec] & valid[:, idx_sec + 1]):
+                        ends = sorted([
+                            (radii[idx_ray, idx_sec], d_radii[idx_ray, idx_sec]),
+                            (radii[idx_ray, idx_sec + 1], d_radii[idx_ray, idx_sec + 1])
+                        ], key=lambda radius_derivative: radius_derivative[0])
+                        segments.append(ends)
+
+            scene_segments.append(sectors_segments)
+        return scene_segments
+
+    @staticmethod
+    def __merge_segments(segments):
+        # same merging rule as SegmentsUnion, keeping the derivative of every union endpoint
+        union = []
+        for start, end in sorted(segments, key=lambda segment: segment[0][0]):
+            if union and start[0] <= union[-1][1][0]:
+                if end[0] > union[-1][1][0]:
+                    union[-1][1] = end
+            else:
+                union.append([start, end])
+        return union
+
+    def __get_wedges(self, d_locations, d_rotations):
+        scene_segments = self.__trace_sector_segments(d_locations, d_rotations)
+
+        centers, rays, cameras, radii, d_radii = [], [], [], [], []
+        for idx_cam, sectors_segments in enumerate(scene_segments):
+            _, cam_loc = self._cameras[idx_cam].get_transform()
+            cam_rays = self._cameras[idx_cam].get_rays() - cam_loc
+
+            for idx_sec, segments in enumerate(sectors_segments):
+                for (radius_min, d_radius_min), (radius_max, d_radius_max) in self.__merge_segments(segments):
+                    centers.append(cam_loc)
+                    rays.append(cam_rays[idx_sec:idx_sec + 2])
+                    cameras.append(idx_cam)
+                    radii.append([radius_min, radius_max])
+                    d_radii.append([d_radius_min, d_radius_max])
+
+        amount = len(self._cameras)
+        return (
+            np.asarray(centers, dtype=np.float64).reshape(-1, 2),
+            np.asarray(radii, dtype=np.float64).reshape(-1, 2),
+            np.asarray(rays, dtype=np.float64).reshape(-1, 2, 2),
+            np.asarray(cameras, dtype=np.int64),
+            np.asarray(d_radii, dtype=np.float64).reshape(-1, 2, amount)
+        )
+
+    def __vertices_derivatives(self, wedges_radii, wedges_rays, wedges_cameras, d_wedges_radii,
+                               d_locations, d_rotations):
+        # vertices follow WedgesCropper.approximate_wedges: from_min, arc_max (from -> to), arc_min (to -> from)
+        num_pts = self._approx_count
+        arc_vectors = self._wedges_cropper.arc_vectors(wedges_rays)
+
+        idx_arc = np.concatenate([[0], np.arange(num_pts), np.arange(num_pts - 1, 0, -1)])
+        is_max = np.concatenate([[False], np.ones(num_pts, dtype=bool), np.zeros(num_pts - 1, dtype=bool)])
+
+        vectors = arc_vectors[:, idx_arc]
+        radii = np.where(is_max[None, :], wedges_radii[:, 1:2], wedges_radii[:, 0:1])
+        d_radii = np.where(is_max[None, :, None], d_wedges_radii[:, None, 1], d_wedges_radii[:, None, 0])
+
+        amount = len(self._cameras)
+        own_camera = np.eye(amount)[wedges_cameras]
+        d_vertices = d_radii[:, :, None, :] * vectors[..., None]
+        d_vertices += (radii[..., None] * _perp(vectors))[..., None] * (own_camera * d_rotations)[:, None, None, :]
+        d_vertices += d_locations[wedges_cameras][:, None, :, None] * own_camera[:, None, None, :]
+        return d_vertices
+
+    def evaluate(self, x_cameras):
+        d_locations, d_rotations = self.place_cameras(x_cameras)
+        wedges_centers, wedges_radii, wedges_rays, wedges_cameras, d_wedges_radii = \
+            self.__get_wedges(d_locations, d_rotations)
+
+        amount = len(self._cameras)
+        if len(wedges_centers) == 0:
+            return 0.0, np.zeros(shape=amount)
+
+        scene_cropped_wedges = self._wedges_cropper.crop_wedges(wedges_centers, wedges_radii, wedges_rays)
+        polygons = scene_cropped_wedges[PolyData.POLYGONS]
+        if self._objective == Objective.UNION:
+            area = self._wedges_cropper.union_area(wedges_centers, wedges_radii, wedges_rays, wedges_cameras)
+        else:
+            area = scene_cropped_wedges[PolyData.AREA]
+
+        vertices = self._wedges_cropper.approximate_wedges(wedges_centers, wedges_radii, wedges_rays)
+        d_vertices = self.__vertices_derivatives(
+            wedges_radii, wedges_rays, wedges_cameras, d_wedges_radii, d_locations, d_rotations
+        )
+
+        # area change is the flux of the moving wedge edges through their parts on the covered boundary
+        edges_from, edges_to = vertices, np.roll(vertices, -1, axis=1)
+        d_edges_from, d_edges_to = d_vertices, np.roll(d_vertices, -1, axis=1)
+        orientation = np.sign(np.sum(cross_2d(edges_from, edges_to), axis=1))
+
+        lines = shapely.linestrings(np.stack([edges_from, edges_to], axis=2).reshape(-1, 2, 2))
+        boundary = shapely.intersection(lines, self._wedges_cropper.region)
+        if self._objective == Objective.UNION:
+            others = np.asarray([
+                union_geometry(polygons[wedges_cameras != idx_cam]) for idx_cam in range(amount)
+            ])
+            edges_cameras = np.repeat(wedges_cameras, vertices.shape[1])
+            boundary = shapely.difference(boundary, others[edges_cameras])
+
+        parts, idx_edges = shapely.get_parts(boundary, return_index=True)
+        is_line = (shapely.get_type_id(parts) == shapely.GeometryType.LINESTRING) & ~shapely.is_empty(parts)
+        parts, idx_edges = parts[is_line], idx_edges[is_line]
+
+        flat_from = edges_from.reshape(-1, 2)[idx_edges]
+        flat_vectors = edges_to.reshape(-1, 2)[idx_edges] - flat_from
+        lengths_sq = np.maximum(np.sum(flat_vectors ** 2, axis=1), np.finfo(np.float64).tiny)
+        part_ends = [
+            shapely.get_coordinates(shapely.get_point(parts, idx_point))
+            for idx_point in (0, -1)
+        ]
+        params = [np.sum((ends - flat_from) * flat_vectors, axis=1) / lengths_sq for ends in part_ends]
+        s_from, s_to = np.minimum(*params), np.maximum(*params)
+
+        edges_count = edges_from.shape[0] * edges_from.shape[1]
+        weight_to = np.bincount(idx_edges, weights=(s_to ** 2 - s_from ** 2) / 2.0, minlength=edges_count)
+        weight_from = np.bincount(idx_edges, weights=s_to - s_from, minlength=edges_count) - weight_to
+
+        edges_vectors = (edges_to - edges_from).reshape(-1, 2)
+        outward = np.stack([edges_vectors[:, 1], -edges_vectors[:, 0]], axis=-1)
+        outward *= np.repeat(orientation, vertices.shape[1])[:, None]
+
+        flux_from = np.einsum('ec,ecn->en', outward, d_edges_from.reshape(-1, 2, amount))
+        flux_to = np.einsum('ec,ecn->en', outward, d_edges_to.reshape(-1, 2, amount))
+        gradient = np.sum(weight_from[:, None] * flux_from + weight_to[:, None] * flux_to, axis=0)
+        return area, gradient
+
+    def check(self, x_cameras, step=1e-6):
+        _, analytic = self.evaluate(x_cameras)
+
+        numeric = np.zeros(shape=len(self._cameras))
+        for idx in range(len(self._cameras)):
+            x_plus = np.asarray(x_cameras, dtype=np.float64).copy()
+            x_minus = x_plus.copy()
+            x_plus[idx] += step
+            x_minus[idx] -= step
+            numeric[idx] = (self.area(x_plus) - self.area(x_minus)) / (2.0 * step)
+        return analytic, numeric
+
+
+class GradientOptimizer:
+    def __init__(self, surface: Surface, d_region, cameras: list[Camera], generation_config: dict):
+        self._surface = surface
+        self._cameras = cameras
+
+        self._min_distance = generation_config['minimal_distance']
+        self._use_soft_penalty = generation_config['use_soft_penalty']
+        self._w_penalty = generation_config['penalty_weight']
+        self._approx_count = generation_config['approximation_count']
+        self._error_rate = generation_config['error_rate']
+        self._objective = generation_config.get('objective', Objective.SUM)
+        self._starts = generation_config.get('gradient_starts', 8)
+        self._max_iterations = generation_config.get('gradient_max_iterations', 100)
+        self._min_spacing = self._min_distance + self._error_rate
+
+        self._area_gradient = AreaGradient(
+            surface=surface, d_region=d_region, cameras=cameras,
+            approximation_count=self._approx_count, objective=self._objective
+        )
+        self._evaluations = 0
+
+    def get_evaluations_count(self):
+        return self._evaluations
+
+    def __calculate_penalty(self, x_cameras, min_distance):
+        lengths = self._surface.arc_length_at(x_cameras)
+        slopes = np.sqrt(1.0 + self._surface.get_1_derivative_values(x_cameras) ** 2)
+
+        penalty = 0.0
+        d_penalty = np.zeros(shape=len(x_cameras))
+        for i in range(len(x_cameras)):
+            for j in range(i + 1, len(x_cameras)):
+                distance = abs(lengths[i] - lengths[j])
+                if distance < min_distance:
+                    penalty += min_distance - distance
+                    direction = np.sign(lengths[i] - lengths[j])
+                    d_penalty[i] -= direction * slopes[i]
+                    d_penalty[j] += direction * slopes[j]
+        return penalty, d_penalty
+
+    def fitness_and_gradient(self, x_cameras):
+        self._evaluations += 1
+        area, d_area = self._area_gradient.evaluate(x_cameras)
+        # optimize against the spacing with error margin so that hard-constrained results stay feasible
+        penalty, d_penalty = self.__calculate_penalty(x_cameras, self._min_spacing)
+        return area - self._w_penalty * penalty, d_area - self._w_penalty * d_penalty
+
+    def evaluate(self, x_cameras):
+        self._evaluations += 1
+        penalty, _ = self.__calculate_penalty(x_cameras, self._min_distance)
+        if not self._use_soft_penalty and penalty > 0.0:
+            return float('-inf')
+        return self._area_gradient.area(x_cameras) - self._w_penalty * penalty
+
+    def __negated(self, x_cameras):
+        fitness, gradient = self.fitness_and_gradient(x_cameras)
+        return -fitness, -gradient
+
+    def process(self):
+        left, right = self._surface.get_surface_bounds()
+        amount = len(self._cameras)
+        bounds = [(float(left), float(right))] * amount
+
+        best_fit = float('-inf')
+        best_ind = None
+        self._evaluations = 0
+
+        for idx_start in range(1, self._starts + 1):
+            print(f'Start\t{idx_start}/{self._starts}')
+
+            # the cameras differ, so every start also draws which camera takes which of the sorted points
+            x_start = self._surface.sample_spaced_points(amount, self._min_spacing)
+            if x_start is None:
+                x_start = [random.uniform(left, right) for _ in range(amount)]
+            random.shuffle(x_start)
+
+            result = minimize(
+                self.__negated, x0=np.asarray(x_start, dtype=np.float64), jac=True, method='L-BFGS-B',
+                bounds=bounds, options={'maxiter': self._max_iterations}
+            )
+            fitness = self.evaluate(result.x)
+
+            if fitness > best_fit:
+                best_fit = fitness
+                best_ind = result.x.tolist()
+
+            print(f'\tfit={fitness}\t\titerations={result.nit}\t\tevaluations={self._evaluations}')
+            print(f'\tbest-fit={best_fit}\t\tbest-ind={best_ind}')
+            print()
+
+        return best_ind, best_fit
@@ -0,0 +1,222 @@
+import numpy as np
+from pathlib import Path
+
+from wedges import PolyData
+from framing import write_header, read_header
+
+
+RECORD_MAGIC = b'RMRECORD'
+RECORD_VERSION = 3
+RECORD_ALIGNMENT = 8
+
+CHUNK_GENERATION = b'GENR'
+CHUNK_COVERAGE = b'COVR'
+CHUNK_HEADER_DTYPE = np.dtype([('tag', 'S4'), ('count', '<u4'), ('size', '<u8')])
+
+
+GENERATION_SCALARS_DTYPE = np.dtype([
+    ('generation', '<i8'),
+    ('evaluations', '<i8'),
+    ('elapsed', '<f8'),
+    ('max_fitness', '<f8'),
+    ('best_fitness', '<f8')
+])
+
+
+def generation_blocks(population_size, cameras_count):
+    # a generation chunk is laid out column-wise, every block holds one column group of that generation,
+    # so across equally sized chunks each column is a single uniformly strided array of the file
+    blocks = []
+    offset = 0
+    for name, dtype, shape in [
+        ('scalars', GENERATION_SCALARS_DTYPE, ()),
+        ('best_individual', np.dtype('<f8'), (cameras_count, )),
+        ('population', np.dtype('<f8'), (population_size, cameras_count)),
+        ('fitnesses', np.dtype('<f8'), (population_size, ))
+    ]:
+        blocks.append((name, dtype, shape, offset))
+        offset += dtype.itemsize * int(np.prod(shape))
+    return blocks, offset
+
+
+class RunRecorder:
+    def __init__(self, record_path: Path, cameras_count: int, metadata: dict = None):
+        self._record_path = record_path
+        self._cameras_count = cameras_count
+
+        header = {
+            'version': RECORD_VERSION,
+            'cameras_count': cameras_count,
+            'metadata': metadata if metadata is not None else {}
+        }
+        with open(str(record_path), 'wb') as bin_file:
+            write_header(bin_file, RECORD_MAGIC, header, RECORD_ALIGNMENT)
+
+        # every chunk is written with a single call and flushed, a crashed run leaves at most one partial chunk
+        self._record_file = open(str(record_path), 'ab')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_path(self):
+        return self._record_path
+
+    def __append_chunk(self, tag, count, payload):
+        chunk_header = np.asarray([(tag, count, len(payload))], dtype=CHUNK_HEADER_DTYPE)
+        self._record_file.write(chunk_header.tobytes() + payload)
+        self._record_file.flush()
+
+    def append_generation(self, generation, evaluations, elapsed, max_fitness, best_fitness, best_individual,
+                          population, fitnesses):
+        population = np.asarray(population, dtype='<f8').reshape(-1, self._cameras_count)
+        scalars = np.asarray([(generation, evaluations, elapsed, max_fitness, best_fitness)],
+                             dtype=GENERATION_SCALARS_DTYPE)
+        best_individual = np.full(self._cameras_count, np.nan) if best_individual is None else best_individual
+
+        payload = b''.join([
+            scalars.tobytes(),
+            np.asarray(best_individual, dtype='<f8').reshape(self._cameras_count).tobytes(),
+            population.tobytes(),
+            np.asarray(fitnesses, dtype='<f8').reshape(len(population)).tobytes()
+        ])
+        self.__append_chunk(CHUNK_GENERATION, len(population), payload)
+
+    def append_coverage(self, generation, individual, fitness, cropped_wedges):
+        offsets = np.asarray(cropped_wedges[PolyData.OFFSETS], dtype='<i8')
+        indices = np.asarray(cropped_wedges[PolyData.INDICES], dtype='<i8')
+        cameras = np.asarray(cropped_wedges.get(PolyData.CAMERAS, np.full(len(indices), -1)), dtype='<i8')
+        points = np.asarray(cropped_wedges[PolyData.POINTS], dtype='<f8').reshape(-1, 2)
+
+        payload = b''.join([
+            np.asarray([generation], dtype='<i8').tobytes(),
+            np.asarray([fitness], dtype='<f8').tobytes(),
+            np.asarray(individual, dtype='<f8').reshape(self._cameras_count).tobytes(),
+            offsets.tobytes(),
+            indices.tobytes(),
+            cameras.tobytes(),
+            points.tobytes()
+        ])
+        self.__append_chunk(CHUNK_COVERAGE, len(indices), payload)
+
+    def close(self):
+        if not self._record_file.closed:
+            self._record_file.close()
+
+
+class RunRecord:
+    def __init__(self, header: dict, generations, coverages: list[dict]):
+        self._header = header
+        self._generations = generations
+        self._coverages = coverages
+
+    def get_header(self):
+        return self._header
+
+    def get_generations_count(self):
+        return len(self._generations['generation'])
+
+    def get_generations(self):
+        return self._generations
+
+    def get_coverages(self):
+        return self._coverages
+
+
+def _read_coverage(payload, polygons_count, cameras_count):
+    values = payload.view('<f8')
+    integers = payload.view('<i8')
+
+    idx_offsets = 2 + cameras_count
+    idx_indices = idx_offsets + polygons_count + 1
+    idx_cameras = idx_indices + polygons_count
+    idx_points = idx_cameras + polygons_count
+    offsets = integers[idx_offsets:idx_indices]
+
+    return {
+        'generation': int(integers[0]),
+        'individual': values[2:idx_offsets],
+        'fitness': float(values[1]),
+        PolyData.OFFSETS: offsets,
+        PolyData.INDICES: integers[idx_indices:idx_cameras],
+        PolyData.CAMERAS: integers[idx_cameras:idx_points],
+        PolyData.POINTS: values[idx_points:idx_points + 2 * int(offsets[-1])].reshape(-1, 2)
+    }
+
+
+def _read_generations(chunks_bytes, population_size, cameras_count):
+    # chunks_bytes holds one generation chunk per row, every column is a view of its block
+    blocks, _ = generation_blocks(population_size, cameras_count)
+    columns = {}
+    for name, dtype, shape, offset in blocks:
+        block = chunks_bytes[:, offset:offset + dtype.itemsize * int(np.prod(shape))].view(dtype)
+        if name == 'scalars':
+            for field in GENERATION_SCALARS_DTYPE.names:
+                columns[field] = block[:, 0][field]
+        else:
+            columns[name] = block.reshape((len(block), ) + shape)
+    return columns
+
+
+def _view_generations(buffer, generation_chunks, cameras_count):
+    if len(generation_chunks) == 0:
+        return _read_generations(np.zeros(shape=(0, generation_blocks(0, cameras_count)[1]), dtype=np.uint8),
+                                 0, cameras_count)
+
+    starts = np.asarray([start for start, _ in generation_chunks])
+    sizes = {population_size for _, population_size in generation_chunks}
+    strides = np.unique(np.diff(starts))
+
+    if len(sizes) == 1 and len(strides) <= 1:
+        # evenly spaced chunks of one population size are exposed as strided views of the mapped file
+        population_size = sizes.pop()
+        chunk_size = generation_blocks(population_size, cameras_count)[1]
+        stride = int(strides[0]) if len(strides) == 1 else chunk_size
+        chunks_bytes = np.lib.stride_tricks.as_strided(
+            buffer[int(starts[0]):], shape=(len(starts), chunk_size), strides=(stride, 1), writeable=False
+        )
+        return _read_generations(chunks_bytes, population_size, cameras_count)
+
+    population_size = max(sizes)
+    chunk_size = generation_blocks(population_size, cameras_count)[1]
+    generations = _read_generations(
+        np.zeros(shape=(len(generation_chunks), chunk_size), dtype=np.uint8), population_size, cameras_count
+    )
+    generations['population'][:] = np.nan
+    generations['fitnesses'][:] = np.nan
+    for idx_gen, (start, size) in enumerate(generation_chunks):
+        chunk_bytes = buffer[start:start + generation_blocks(size, cameras_count)[1]][None, :]
+        for name, column in _read_generations(chunk_bytes, size, cameras_count).items():
+            generations[name][(idx_gen, ) + tuple(slice(0, extent) for extent in column.shape[1:])] = column[0]
+    return generations
+
+
+def load_run_record(record_path: Path):
+    assert record_path.exists(), f'Run record file {str(record_path)} does not exist.'
+
+    header, data_start = read_header(record_path, RECORD_MAGIC, RECORD_ALIGNMENT, 'run record')
+    assert header['version'] == RECORD_VERSION, \
+        f'Run record version {header["version"]} is not supported (expected {RECORD_VERSION}).'
+    cameras_count = header['cameras_count']
+
+    generation_chunks = []
+    coverages = []
+    buffer = np.memmap(str(record_path), dtype=np.uint8, mode='r')
+    offset = data_start
+    while offset + CHUNK_HEADER_DTYPE.itemsize <= len(buffer):
+        tag, count, size = buffer[offset:offset + CHUNK_HEADER_DTYPE.itemsize].view(CHUNK_HEADER_DTYPE)[0]
+        start = offset + CHUNK_HEADER_DTYPE.itemsize
+        if start + size > len(buffer):
+            # partial chunk of an interrupted run
+            break
+
+        if tag == CHUNK_GENERATION:
+            generation_chunks.append((start, int(count)))
+        elif tag == CHUNK_COVERAGE:
+            coverages.append(_read_coverage(buffer[start:start + size], int(count), cameras_count))
+        offset = start + int(size)
+
+    return RunRecord(header=header, generations=_view_generations(buffer, generation_chunks, cameras_count),
+                     coverages=coverages)
@@ -0,0 +1,157 @@
+import os
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+
+from surface import Surface
+from camera import Camera
+from tools import create_surface_from_config, create_region_from_config, create_camera_from_config
+from framing import align_offset, write_header, read_header
+
+
+SCENARIO_MAGIC = b'RMSCNRIO'
+SCENARIO_VERSION = 2
+SCENARIO_ALIGNMENT = 64
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def hash_scenario_configs(config_paths: list[Path]):
+    digest = hashlib.sha256()
+    for config_path in config_paths:
+        assert config_path.exists(), f'Scenario config file {str(config_path)} does not exist.'
+        config_bytes = config_path.read_bytes()
+        digest.update(config_bytes)
+
+        # a binary surface profile referenced by the config is a part of the scenario source as well
+        points_file = json.loads(config_bytes).get('points_file', None)
+        if points_file is not None:
+            points_path = config_path.parent / points_file
+            assert points_path.exists(), f'Surface points file {str(points_path)} does not exist.'
+            with open(str(points_path), 'rb') as bin_file:
+                for block in iter(lambda: bin_file.read(HASH_BLOCK_SIZE), b''):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+class Scenario:
+    def __init__(self, surface: Surface, d_region: tuple, cameras: list[Camera], source_hash: str):
+        self._surface = surface
+        self._d_region = d_region
+        self._cameras = cameras
+        self._source_hash = source_hash
+
+    def get_surface(self):
+        return self._surface
+
+    def get_region(self):
+        return self._d_region
+
+    def get_cameras(self):
+        return self._cameras
+
+    def get_hash(self):
+        return self._source_hash
+
+
+def compile_scenario(surface_config: Path, region_config: Path, camera_configs: list[Path], output_path: Path):
+    surface = create_surface_from_config(surface_config)
+    d_region = create_region_from_config(region_config)
+    cameras = [create_camera_from_config(conf_cam) for conf_cam in camera_configs]
+    source_hash = hash_scenario_configs([surface_config, region_config, *camera_configs])
+
+    breakpoints, spline_c, derivative_c = surface.get_spline_coefficients()
+    arrays = {
+        'points': surface.get_points(),
+        'breakpoints': breakpoints,
+        'spline_c': spline_c,
+        'derivative_c': derivative_c,
+        'arc_length_table': surface.get_arc_length_table(),
+        'region': np.asarray(d_region, dtype=np.float64)
+    }
+    for idx_cam, cam in enumerate(cameras):
+        arrays[f'camera_{idx_cam}_rays'] = cam.get_base_rays()
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = align_offset(offset + array.nbytes, SCENARIO_ALIGNMENT)
+
+    # source configs are stored relative to the compiled file so that loading can verify them by default
+    source_configs = [
+        os.path.relpath(conf_path.resolve(), output_path.resolve().parent)
+        for conf_path in [surface_config, region_config, *camera_configs]
+    ]
+    header = {
+        'version': SCENARIO_VERSION,
+        'source_hash': source_hash,
+        'source_configs': source_configs,
+        'cameras_fov': [float(cam.get_fov()) for cam in cameras],
+        'arrays': layout
+    }
+
+    with open(str(output_path), 'wb') as bin_file:
+        data_start = write_header(bin_file, SCENARIO_MAGIC, header, SCENARIO_ALIGNMENT)
+        for name, array in arrays.items():
+            bin_file.seek(data_start + layout[name]['offset'])
+            bin_file.write(array.tobytes())
+        bin_file.truncate(data_start + offset)
+
+    return source_hash
+
+
+def read_scenario_header(scenario_path: Path):
+    assert scenario_path.exists(), f'Compiled scenario file {str(scenario_path)} does not exist.'
+
+    header, data_start = read_header(scenario_path, SCENARIO_MAGIC, SCENARIO_ALIGNMENT, 'compiled scenario')
+    assert header['version'] == SCENARIO_VERSION, \
+        f'Compiled scenario version {header["version"]} is not supported (expected {SCENARIO_VERSION}).'
+    header['data_start'] = data_start
+    return header
+
+
+def check_scenario_sources(scenario_path: Path, config_paths: list[Path] = None, header: dict = None):
+    if header is None:
+        header = read_scenario_header(scenario_path)
+    if config_paths is None:
+        config_paths = [scenario_path.parent / conf_path for conf_path in header['source_configs']]
+
+    for conf_path in config_paths:
+        assert conf_path.exists(), \
+            f'Source config {str(conf_path)} of compiled scenario {str(scenario_path)} does not exist, ' \
+            f'pass check_sources=False to load the scenario without checking it.'
+    source_hash = hash_scenario_configs(config_paths)
+    assert source_hash == header['source_hash'], \
+        f'Compiled scenario {str(scenario_path)} is outdated, recompile it from the source configs.'
+
+
+def load_compiled_scenario(scenario_path: Path, config_paths: list[Path] = None, check_sources=True):
+    header = read_scenario_header(scenario_path)
+    if check_sources:
+        check_scenario_sources(scenario_path, config_paths=config_paths, header=header)
+
+    buffer = np.memmap(str(scenario_path), dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, layout in header['arrays'].items():
+        dtype = np.dtype(layout['dtype'])
+        start = header['data_start'] + layout['offset']
+        size = int(np.prod(layout['shape'])) * dtype.itemsize
+        arrays[name] = buffer[start:start + size].view(dtype).reshape(layout['shape'])
+
+    surface = Surface(
+        points=arrays['points'],
+        coefficients=(arrays['breakpoints'], arrays['spline_c'], arrays['derivative_c']),
+        arc_length_table=arrays['arc_length_table']
+    )
+    (left, right), (bottom, top) = arrays['region'].tolist()
+    d_region = [left, right], [bottom, top]
+
+    cameras = []
+    for idx_cam, fov_rad in enumerate(header['cameras_fov']):
+        cam_rays = arrays[f'camera_{idx_cam}_rays']
+        cameras.append(Camera(fov_rad=fov_rad, res_pix=len(cam_rays) - 1, rays=cam_rays))
+
+    return Scenario(surface=surface, d_region=d_region, cameras=cameras, source_hash=header['source_hash'])
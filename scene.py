@@ -1,9 +1,31 @@
 import numpy as np
+import shapely
 
 from surface import Surface
 from camera import Camera
 from segment_union import SegmentsUnion
-from wedges import WedgesCropper, PolyData
+from wedges import WedgesCropper, PolyData, region_box, regions_envelope, cross_2d, PARALLEL_TOLERANCE
+
+
+TRACE_DTYPE = np.dtype([
+    ('camera_i', np.int32),
+    ('camera_j', np.int32),
+    ('ray', np.int32),
+    ('sector', np.int32),
+    ('hits', np.float64, (2, 2)),
+    ('valid', np.bool_, (2, ))
+])
+
+
+class Objective:
+    SUM = 'sum'
+    UNION = 'union'
+
+
+class TraceRecord:
+    NONE = 'none'
+    COMPACT = 'compact'
+    FULL = 'full'
 
 
 class SectorProcessor:
@@ -48,12 +70,35 @@ class SectorProcessor:
 
         return inter_from, inter_to
 
+    def add_wedges(self, wedges_radii):
+        self._seg_un.extend(wedges_radii)
+
     def get_sector_wedges_union(self):
         return self._seg_un.get_union()
 
 
+def intersect_fov_rays(location, fov_rays, ray_center, rays_directions):
+    # closed-form intersection of every ray (rows) with every fov ray (columns): location + t * fov_ray
+    rays_directions = np.asarray(rays_directions, dtype=np.float64)
+    shift = np.asarray(ray_center, dtype=np.float64) - location
+
+    fov_norms = np.linalg.norm(fov_rays, axis=1)
+    rays_norms = np.linalg.norm(rays_directions, axis=1)
+
+    det = cross_2d(fov_rays[None, :], rays_directions[:, None])
+    not_parallel = np.abs(det) > PARALLEL_TOLERANCE * fov_norms[None, :] * rays_norms[:, None]
+
+    safe_det = np.where(not_parallel, det, 1.0)
+    t = cross_2d(shift, rays_directions)[:, None] / safe_det
+    u = cross_2d(shift, fov_rays)[None, :] / safe_det
+    valid = not_parallel & (t >= 0.0) & (u >= 0.0)
+    return t, safe_det, valid
+
+
 class FovProcessor:
     def __init__(self, location, fov_rays):
+        self._location = np.asarray(location, dtype=np.float64)
+        self._fov_rays = np.asarray(fov_rays, dtype=np.float64)
         self._sectors_processors = []
         self._fov_sectors_angles = []
 
@@ -76,6 +121,22 @@ class FovProcessor:
             intersections.append([inter_from, inter_to])
         return intersections
 
+    def trace_rays(self, ray_center, rays_directions, record_hits=True):
+        fov_rays = self._fov_rays
+        t, _, valid = intersect_fov_rays(self._location, fov_rays, ray_center, rays_directions)
+
+        radii = t * np.linalg.norm(fov_rays, axis=1)[None, :]
+        for idx_sec, sec_proc in enumerate(self._sectors_processors):
+            sec_valid = valid[:, idx_sec] & valid[:, idx_sec + 1]
+            sec_radii = np.sort(radii[sec_valid, idx_sec:idx_sec + 2], axis=1)
+            sec_proc.add_wedges(sec_radii.tolist())
+
+        # hit points are only needed for the trace records, the wedges are built from the radii alone
+        if not record_hits:
+            return None, valid
+        hits = self._location + t[..., None] * fov_rays[None, :]
+        return hits, valid
+
     def get_fov_wedges_union(self):
         fov_union = []
         for sec_proc in self._sectors_processors:
@@ -106,7 +167,7 @@ class SceneProcessor:
     def get_scene_sectors_angles(self):
         return self._scene_sectors_angles
 
-    def trace_scene_rays(self):
+    def trace_scene_rays(self, record=TraceRecord.FULL):
         scene_intersections = []
         for i in range(len(self._cameras)):
             cam_intersections = []
@@ -119,14 +180,41 @@ class SceneProcessor:
                 cam = self._cameras[j]
 
                 cam_rot, cam_loc = cam.get_transform()
-                cam_rays = cam.get_rays()
-
-                for ray in cam_rays:
-                    unit_ray = ray - cam_loc
-                    ray_intersections = fov_proc.trace_next_ray(cam_loc, unit_ray)
-                    cam_intersections.append(ray_intersections)
+                unit_rays = cam.get_rays() - cam_loc
+                hits, valid = fov_proc.trace_rays(cam_loc, unit_rays, record_hits=record != TraceRecord.NONE)
+
+                if record == TraceRecord.COMPACT:
+                    amount_rays, amount_sectors = hits.shape[0], hits.shape[1] - 1
+                    ray_idx, sec_idx = np.meshgrid(np.arange(amount_rays), np.arange(amount_sectors), indexing='ij')
+
+                    pair_records = np.zeros(shape=amount_rays * amount_sectors, dtype=TRACE_DTYPE)
+                    pair_records['camera_i'] = i
+                    pair_records['camera_j'] = j
+                    pair_records['ray'] = ray_idx.ravel()
+                    pair_records['sector'] = sec_idx.ravel()
+                    pair_records['hits'] = np.stack([hits[:, :-1], hits[:, 1:]], axis=2).reshape(-1, 2, 2)
+                    pair_records['valid'] = np.stack([valid[:, :-1], valid[:, 1:]], axis=2).reshape(-1, 2)
+                    cam_intersections.append(pair_records)
+
+                elif record == TraceRecord.FULL:
+                    points = [
+                        [hit if is_valid else None for hit, is_valid in zip(ray_hits, ray_valid)]
+                        for ray_hits, ray_valid in zip(hits, valid)
+                    ]
+                    for ray_points in points:
+                        ray_intersections = [
+                            [ray_points[idx_sec], ray_points[idx_sec + 1]]
+                            for idx_sec in range(len(ray_points) - 1)
+                        ]
+                        cam_intersections.append(ray_intersections)
 
             scene_intersections.append(cam_intersections)
+
+        if record == TraceRecord.NONE:
+            return None
+        if record == TraceRecord.COMPACT:
+            pairs_records = [pair_records for cam_records in scene_intersections for pair_records in cam_records]
+            return np.concatenate(pairs_records) if pairs_records else np.zeros(shape=0, dtype=TRACE_DTYPE)
         return scene_intersections
 
     def get_scene_wedges_union(self):
@@ -136,38 +224,67 @@ class SceneProcessor:
             scene_wedges_union.append(fov_wedges_union)
         return scene_wedges_union
 
-    def crop_region(self):
+    def get_scene_wedges(self):
         scene_wedges_union = self.get_scene_wedges_union()
 
-        scene_area = 0.0
-        scene_cropped_poly_points = []
+        wedges_centers, wedges_radii, wedges_rays, wedges_cameras = [], [], [], []
         for idx_cam, fov_wedges_union in enumerate(scene_wedges_union):
             cam = self._cameras[idx_cam]
             _, cam_loc = cam.get_transform()
             cam_rays = cam.get_rays() - cam_loc
 
             for idx_sec, sector_wedges_union in enumerate(fov_wedges_union):
-                sec_rays = cam_rays[idx_sec], cam_rays[idx_sec + 1]
-
                 for wedge_radii in sector_wedges_union:
-                    wedge_poly = self._wedges_cropper.crop_wedge(
-                        wedge_center=cam_loc, wedge_radii=wedge_radii, wedge_rays=sec_rays
-                    )
+                    wedges_centers.append(cam_loc)
+                    wedges_radii.append(wedge_radii)
+                    wedges_rays.append(cam_rays[idx_sec:idx_sec + 2])
+                    wedges_cameras.append(idx_cam)
+
+        return (
+            np.asarray(wedges_centers, dtype=np.float64).reshape(-1, 2),
+            np.asarray(wedges_radii, dtype=np.float64).reshape(-1, 2),
+            np.asarray(wedges_rays, dtype=np.float64).reshape(-1, 2, 2),
+            np.asarray(wedges_cameras, dtype=np.int64)
+        )
+
+    def crop_region_batch(self):
+        wedges_centers, wedges_radii, wedges_rays, wedges_cameras = self.get_scene_wedges()
+        scene_cropped_wedges = self._wedges_cropper.crop_wedges(wedges_centers, wedges_radii, wedges_rays)
+        scene_cropped_wedges[PolyData.CAMERAS] = wedges_cameras[scene_cropped_wedges[PolyData.INDICES]]
+        return scene_cropped_wedges
+
+    def get_covered_area(self, objective=Objective.SUM):
+        wedges_centers, wedges_radii, wedges_rays, wedges_cameras = self.get_scene_wedges()
+        if objective == Objective.UNION:
+            return self._wedges_cropper.union_area(wedges_centers, wedges_radii, wedges_rays, wedges_cameras)
+
+        scene_cropped_wedges = self._wedges_cropper.crop_wedges(wedges_centers, wedges_radii, wedges_rays)
+        return scene_cropped_wedges[PolyData.AREA]
+
+    def get_covered_areas(self, d_regions, objective=Objective.SUM):
+        wedges_centers, wedges_radii, wedges_rays, wedges_cameras = self.get_scene_wedges()
+        if objective == Objective.UNION:
+            return self._wedges_cropper.union_areas(
+                wedges_centers, wedges_radii, wedges_rays, wedges_cameras, d_regions
+            )
+
+        envelope_cropper = WedgesCropper(regions_envelope(d_regions), arc_pts_count=self._wedges_cropper.num_pts)
+        scene_cropped_wedges = envelope_cropper.crop_wedges(wedges_centers, wedges_radii, wedges_rays)
+
+        polygons = scene_cropped_wedges[PolyData.POLYGONS]
+        return [
+            float(np.sum(shapely.area(shapely.intersection(polygons, region_box(d_region)))))
+            for d_region in d_regions
+        ]
 
-                    if wedge_poly is None:
-                        break
-
-                    wedge_points = wedge_poly[PolyData.POINTS]
-                    if isinstance(wedge_points, np.ndarray):    # Polygon
-                        scene_cropped_poly_points.append(wedge_points)
-                    else:                                       # MultiPolygon
-                        for points in wedge_points:
-                            scene_cropped_poly_points.append(points)
-                    scene_area += wedge_poly[PolyData.AREA]
+    def crop_region(self):
+        scene_cropped_wedges = self.crop_region_batch()
+        points = scene_cropped_wedges[PolyData.POINTS]
+        offsets = scene_cropped_wedges[PolyData.OFFSETS]
 
         return {
-            PolyData.POINTS: scene_cropped_poly_points,
-            PolyData.AREA: scene_area
+            PolyData.POINTS: [points[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])],
+            PolyData.AREA: scene_cropped_wedges[PolyData.AREA]
         }
 
     def get_distances_between_cameras(self):
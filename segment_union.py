@@ -10,6 +10,12 @@ class SegmentsUnion:
         bisect.insort(self.segments_axis, (new_a, False), key=lambda val_flag: val_flag)
         bisect.insort(self.segments_axis, (new_b, True), key=lambda val_flag: val_flag)
 
+    def extend(self, new_segments):
+        for new_a, new_b in new_segments:
+            self.segments_axis.append((new_a, False))
+            self.segments_axis.append((new_b, True))
+        self.segments_axis.sort()
+
     def get_union(self):
         flag_counter = 0
         segment_started = None
@@ -1,37 +1,98 @@
+import random
 import numpy as np
-from scipy.integrate import quad
-from scipy.interpolate import CubicSpline
+from scipy.interpolate import CubicSpline, PPoly
+
+
+ARC_TABLE_SIZE = 4096
+DECIMATION_START_KNOTS = 64
+BATCH_SORT_SIZE = 4096
+GAUSS_NODES, GAUSS_WEIGHTS = np.polynomial.legendre.leggauss(5)
+
+
+def decimate_points(x, y, tolerance):
+    keep = np.zeros(shape=len(x), dtype=bool)
+    keep[::max(1, len(x) // DECIMATION_START_KNOTS)] = True
+    keep[-1] = True
+
+    while True:
+        spline = CubicSpline(x[keep], y[keep], bc_type='natural')
+        errors = np.abs(spline(x) - y)
+        exceeded = errors > tolerance
+        if not np.any(exceeded):
+            return spline
+
+        intervals = np.cumsum(keep) - 1
+        interval_starts = np.flatnonzero(keep)
+        worst_errors = np.maximum.reduceat(errors, interval_starts)
+        keep |= exceeded & (errors == worst_errors[intervals])
+
+
+def evaluate_sorted(function, x_values):
+    # large unordered batches are evaluated in ascending order to keep spline interval lookups cache-friendly
+    x_values = np.asarray(x_values)
+    if x_values.size < BATCH_SORT_SIZE:
+        return function(x_values)
+
+    x_flat = x_values.ravel()
+    order = np.argsort(x_flat)
+    sorted_values = function(x_flat[order])
+
+    values = np.empty_like(sorted_values)
+    values[order] = sorted_values
+    return values.reshape(x_values.shape + sorted_values.shape[1:])
 
 
 class Surface:
-    def __init__(self, points):
+    def __init__(self, points, coefficients=None, arc_length_table=None, tolerance=None):
         self._points = points
 
-        x, y = self._points.T
-        self._spline = CubicSpline(x, y, bc_type='natural')
-        self._derivative = self._spline.derivative()
+        if coefficients is None:
+            x, y = np.asarray(self._points, dtype=np.float64).T
+            if tolerance is None:
+                self._spline = CubicSpline(x, y, bc_type='natural')
+            else:
+                self._spline = decimate_points(x, y, tolerance)
+            self._derivative = self._spline.derivative()
+        else:
+            breakpoints, spline_c, derivative_c = coefficients
+            self._spline = PPoly.construct_fast(spline_c, breakpoints)
+            self._derivative = PPoly.construct_fast(derivative_c, breakpoints)
+        self._derivative_2 = self._derivative.derivative()
+
+        if arc_length_table is None:
+            arc_length_table = self.__build_arc_length_table()
+        self._arc_table = arc_length_table
 
     def get_points(self):
         return self._points
 
+    def get_spline_coefficients(self):
+        return self._spline.x, self._spline.c, self._derivative.c
+
+    def get_arc_length_table(self):
+        return self._arc_table
+
     def get_surface_bounds(self):
         x, _ = self._points.T
         return x[0], x[-1]
 
     def get_function_values(self, x_values):
-        return self._spline(x_values)
+        return evaluate_sorted(self._spline, x_values)
 
     def get_1_derivative_values(self, x_values):
-        return self._derivative(x_values)
+        return evaluate_sorted(self._derivative, x_values)
+
+    def get_2_derivative_values(self, x_values):
+        return evaluate_sorted(self._derivative_2, x_values)
 
     def tangent_at_point(self, x_point):
-        dy_dx = self._derivative(x_point)
+        dy_dx = self.get_1_derivative_values(x_point)
         magnitude = (1.0 + dy_dx ** 2) ** 0.5
         tangent = np.asarray([1.0 / magnitude, dy_dx / magnitude]).T
         return tangent
 
     def normal_at_point(self, x_point):
-        dy_dx = self._derivative(x_point)
+        dy_dx = self.get_1_derivative_values(x_point)
         magnitude = (1.0 + dy_dx ** 2) ** 0.5
         normal = np.asarray([-dy_dx / magnitude, 1.0 / magnitude]).T
         return normal
@@ -39,6 +100,50 @@ class Surface:
     def __arc_length(self, x):
         return np.sqrt(1.0 + self._derivative(x) ** 2)
 
+    def __integrate_arc_length(self, x_from, x_to):
+        half = (x_to - x_from) / 2.0
+        middle = (x_to + x_from) / 2.0
+        nodes = middle[..., None] + half[..., None] * GAUSS_NODES
+        return half * np.sum(GAUSS_WEIGHTS * self.__arc_length(nodes), axis=-1)
+
+    def __build_arc_length_table(self):
+        knots = self._spline.x
+        refine = max(1, int(np.ceil(ARC_TABLE_SIZE / (len(knots) - 1))))
+        steps = np.linspace(0.0, 1.0, refine + 1)[:-1]
+
+        grid = (knots[:-1, None] + np.diff(knots)[:, None] * steps).ravel()
+        grid = np.append(grid, knots[-1])
+
+        lengths = self.__integrate_arc_length(grid[:-1], grid[1:])
+        cumulative = np.concatenate([[0.0], np.cumsum(lengths)])
+        return np.asarray([grid, cumulative])
+
+    def __arc_length_at(self, x_values):
+        grid, cumulative = self._arc_table
+        idx = np.clip(np.searchsorted(grid, x_values, side='right') - 1, 0, len(grid) - 2)
+        return cumulative[idx] + self.__integrate_arc_length(grid[idx], x_values)
+
+    def arc_length_at(self, x_values):
+        return evaluate_sorted(self.__arc_length_at, np.asarray(x_values, dtype=np.float64))
+
+    def x_at_arc_length(self, lengths, iterations=3):
+        grid, cumulative = self._arc_table
+        lengths = np.asarray(lengths, dtype=np.float64)
+        x_values = np.interp(lengths, cumulative, grid)
+        for _ in range(iterations):
+            x_values = x_values - (self.arc_length_at(x_values) - lengths) / self.__arc_length(x_values)
+        return x_values
+
+    def sample_spaced_points(self, amount, spacing):
+        left, right = self.get_surface_bounds()
+        length_left, length_right = self.arc_length_at([left, right])
+        slack = (length_right - length_left) - (amount - 1) * spacing
+        if slack < 0.0:
+            return None
+
+        offsets = sorted(random.uniform(0.0, slack) for _ in range(amount))
+        lengths = length_left + np.asarray(offsets) + np.arange(amount) * spacing
+        return self.x_at_arc_length(lengths).tolist()
+
     def arc_length(self, x1, x2):
-        length, _ = quad(self.__arc_length, x1, x2)
-        return np.abs(length)
+        return np.abs(self.arc_length_at(x2) - self.arc_length_at(x1))
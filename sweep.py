@@ -0,0 +1,202 @@
+import io
+import csv
+import json
+import random
+import hashlib
+import itertools
+import contextlib
+import numpy as np
+from time import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from algorithm import GeneticAlgorithm
+from scenario import read_scenario_header, check_scenario_sources, load_compiled_scenario
+
+
+def create_sweep_from_config(config_path: Path):
+    assert config_path.exists(), f'Sweep config file {str(config_path)} does not exist.'
+
+    with open(str(config_path), 'r') as json_file:
+        data = json.load(json_file)
+        grid = data.get('grid', None)
+        random_search = data.get('random', None)
+        seeds = data.get('seeds', None)
+        assert (grid is None) != (random_search is None), 'Exactly one of parameters grid or random has to be set.'
+        assert seeds is not None, 'Parameter seeds has to be set.'
+
+        if grid is not None:
+            overrides = expand_grid(grid)
+        else:
+            overrides = sample_random_search(
+                space=random_search['space'], count=random_search['count'], seed=random_search.get('seed', 0)
+            )
+        return overrides, seeds
+
+
+def expand_grid(grid: dict):
+    names = sorted(grid.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def sample_random_search(space: dict, count: int, seed: int):
+    rng = random.Random(seed)
+    overrides = []
+    for _ in range(count):
+        override = {}
+        for name in sorted(space.keys()):
+            spec = space[name]
+            if 'choices' in spec:
+                override[name] = rng.choice(spec['choices'])
+            elif spec.get('log', False):
+                override[name] = float(np.exp(rng.uniform(np.log(spec['low']), np.log(spec['high']))))
+            elif isinstance(spec['low'], int) and isinstance(spec['high'], int):
+                override[name] = rng.randint(spec['low'], spec['high'])
+            else:
+                override[name] = rng.uniform(spec['low'], spec['high'])
+        overrides.append(override)
+    return overrides
+
+
+def evaluations_to_reach(history, target_fitness):
+    for _, evaluations, _, best_fit, _ in history:
+        if best_fit >= target_fitness:
+            return evaluations
+    return None
+
+
+def evaluations_saved(baseline_history, history, target_fitness=None):
+    if target_fitness is None:
+        target_fitness = min(baseline_history[-1][3], history[-1][3])
+    baseline_evaluations = evaluations_to_reach(baseline_history, target_fitness)
+    evaluations = evaluations_to_reach(history, target_fitness)
+
+    if baseline_evaluations is None or evaluations is None:
+        return target_fitness, baseline_evaluations, evaluations, None
+    return target_fitness, baseline_evaluations, evaluations, baseline_evaluations - evaluations
+
+
+def run_single(scenario_path: Path, generation_config: dict, seed: int):
+    scenario = load_compiled_scenario(scenario_path)
+
+    random.seed(seed)
+    solver = GeneticAlgorithm(
+        surface=scenario.get_surface(), d_region=scenario.get_region(),
+        cameras=scenario.get_cameras(), generation_config=generation_config
+    )
+
+    t_before = time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        best_ind, best_fit = solver.process()
+    t_after = time()
+
+    # with hard constraints every individual of a run can be infeasible, such a run is recorded as failed
+    feasible = best_ind is not None
+    return {
+        'feasible': feasible,
+        'best_fitness': float(best_fit) if feasible else None,
+        'best_individual': [float(x) for x in best_ind] if feasible else None,
+        'wall_time': t_after - t_before,
+        'evaluations': solver.get_evaluations_count(),
+        'history': [[float(value) for value in record] for record in solver.get_history()]
+    }
+
+
+class SweepRunner:
+    def __init__(self, scenario_path: Path, base_config: dict, cache_dir: Path, workers_count=None):
+        self._scenario_path = scenario_path
+        check_scenario_sources(scenario_path)
+        self._scenario_hash = read_scenario_header(scenario_path)['source_hash']
+        self._base_config = base_config
+        self._cache_dir = cache_dir
+        self._workers_count = workers_count
+
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def __run_key(self, generation_config, seed):
+        key = json.dumps({
+            'config': generation_config,
+            'scenario_hash': self._scenario_hash,
+            'seed': seed
+        }, sort_keys=True)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def run(self, overrides: list[dict], seeds: list[int]):
+        runs = []
+        for override in overrides:
+            generation_config = {**self._base_config, **override}
+            for seed in seeds:
+                cache_path = self._cache_dir / f'{self.__run_key(generation_config, seed)}.json'
+                runs.append((override, generation_config, seed, cache_path))
+
+        results = {}
+        pending = []
+        for idx_run, (_, _, _, cache_path) in enumerate(runs):
+            if cache_path.exists():
+                with open(str(cache_path), 'r') as json_file:
+                    results[idx_run] = json.load(json_file)
+            else:
+                pending.append(idx_run)
+
+        print(f'Sweep: {len(runs)} runs, {len(runs) - len(pending)} cached, {len(pending)} to compute')
+
+        with ProcessPoolExecutor(max_workers=self._workers_count) as executor:
+            futures = {
+                executor.submit(run_single, self._scenario_path, runs[idx_run][1], runs[idx_run][2]): idx_run
+                for idx_run in pending
+            }
+            for future in as_completed(futures):
+                idx_run = futures[future]
+                result = future.result()
+                with open(str(runs[idx_run][3]), 'w') as json_file:
+                    json.dump(result, json_file)
+                results[idx_run] = result
+                status = f'best-fit={result["best_fitness"]}' if result['feasible'] else 'no feasible individual'
+                print(f'\tfinished {runs[idx_run][0]} seed={runs[idx_run][2]}: {status}')
+
+        return [
+            {'override': override, 'seed': seed, **results[idx_run]}
+            for idx_run, (override, _, seed, _) in enumerate(runs)
+        ]
+
+    @staticmethod
+    def summarize(results: list[dict], target_fitness=None):
+        groups = {}
+        for result in results:
+            key = json.dumps(result['override'], sort_keys=True)
+            groups.setdefault(key, []).append(result)
+
+        summary = []
+        for key, group in groups.items():
+            fitnesses = [result['best_fitness'] for result in group if result.get('feasible', True)]
+            row = {
+                **json.loads(key),
+                'runs': len(group),
+                'feasible_runs': len(fitnesses),
+                'best_fitness_mean': float(np.mean(fitnesses)) if fitnesses else None,
+                'best_fitness_max': float(np.max(fitnesses)) if fitnesses else None,
+                'wall_time_mean': float(np.mean([result['wall_time'] for result in group])),
+                'evaluations_mean': float(np.mean([result['evaluations'] for result in group]))
+            }
+            if target_fitness is not None:
+                reached = [evaluations_to_reach(result['history'], target_fitness) for result in group]
+                reached = [evaluations for evaluations in reached if evaluations is not None]
+                row['target_hit_rate'] = len(reached) / len(group)
+                row['evaluations_to_target_mean'] = float(np.mean(reached)) if reached else None
+            summary.append(row)
+
+        summary.sort(key=lambda row: (
+            -row['best_fitness_mean'] if row['best_fitness_mean'] is not None else float('inf'), row['wall_time_mean']
+        ))
+        return summary
+
+    @staticmethod
+    def write_summary(summary: list[dict], output_path: Path):
+        columns = []
+        for row in summary:
+            columns.extend(name for name in row.keys() if name not in columns)
+
+        with open(str(output_path), 'w', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(summary)
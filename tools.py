@@ -6,15 +6,40 @@ from surface import Surface
 from camera import Camera
 
 
+def load_surface_points(points_path: Path, dtype=np.float64):
+    assert points_path.exists(), f'Surface S(x) points file {str(points_path)} does not exist.'
+
+    if points_path.suffix == '.npy':
+        points = np.load(str(points_path), mmap_mode='r')
+    else:
+        points = np.memmap(str(points_path), dtype=dtype, mode='r').reshape(-1, 2)
+
+    assert points.ndim == 2 and points.shape[1] == 2, 'Surface S(x) points have to be an array of shape (N, 2).'
+    return points
+
+
+def create_surface_from_binary(points_path: Path, dtype=np.float64, tolerance=None):
+    points = load_surface_points(points_path, dtype=dtype)
+    surface = Surface(points=points, tolerance=tolerance)
+    return surface
+
+
 def create_surface_from_config(config_path: Path):
     assert config_path.exists(), f'Surface S(x) config file {str(config_path)} does not exist.'
 
     with open(str(config_path), 'r') as json_file:
         data = load(json_file)
         points = data.get('points', None)
-        assert points is not None, 'Parameter points has to be set.'
+        points_file = data.get('points_file', None)
+        tolerance = data.get('tolerance', None)
+        assert (points is None) != (points_file is None), 'Exactly one of parameters points or points_file has to be set.'
 
-        surface = Surface(points=np.asarray(points, dtype=np.float32))
+        if points_file is not None:
+            points_path = config_path.parent / points_file
+            dtype = np.dtype(data.get('points_dtype', 'float64'))
+            return create_surface_from_binary(points_path, dtype=dtype, tolerance=tolerance)
+
+        surface = Surface(points=np.asarray(points, dtype=np.float32), tolerance=tolerance)
         return surface
 
 
@@ -31,6 +56,26 @@ def create_region_from_config(config_path: Path):
         return x_range, y_range
 
 
+def create_regions_from_config(config_path: Path):
+    assert config_path.exists(), f'Regions D config file {str(config_path)} does not exist.'
+
+    with open(str(config_path), 'r') as json_file:
+        data = load(json_file)
+        regions = data.get('regions', None)
+        assert regions is not None, 'Parameter regions has to be set.'
+
+        d_regions, weights = [], []
+        for region in regions:
+            x_range = region.get('x_range', None)
+            y_range = region.get('y_range', None)
+            assert x_range is not None, 'Parameter x_range has to be set for every region.'
+            assert y_range is not None, 'Parameter y_range has to be set for every region.'
+            d_regions.append((x_range, y_range))
+            weights.append(region.get('weight', 1.0))
+
+        return d_regions, weights
+
+
 def create_camera_from_config(config_path: Path):
     assert config_path.exists(), f'Camera C config file {str(config_path)} does not exist.'
 
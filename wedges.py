@@ -1,16 +1,80 @@
 import numpy as np
+import shapely
 from shapely.geometry import MultiPolygon, Polygon, box
 
 
+PARALLEL_TOLERANCE = 2.0 * np.finfo(np.float64).eps
+
+
 class PolyData:
     POINTS = 'points'
     AREA = 'area'
+    OFFSETS = 'offsets'
+    INDICES = 'indices'
+    AREAS = 'areas'
+    POLYGONS = 'polygons'
+    CAMERAS = 'cameras'
+
+
+def region_box(d_region):
+    (left, right), (bottom, top) = d_region
+    return box(minx=left, miny=bottom, maxx=right, maxy=top)
+
+
+def regions_envelope(d_regions):
+    lefts, rights = zip(*(x_range for x_range, _ in d_regions))
+    bottoms, tops = zip(*(y_range for _, y_range in d_regions))
+    return [min(lefts), max(rights)], [min(bottoms), max(tops)]
+
+
+def union_geometry(polygons):
+    non_empty = polygons[~shapely.is_empty(polygons)]
+    return shapely.union_all(non_empty)
+
+
+def cross_2d(vectors_a, vectors_b):
+    return vectors_a[..., 0] * vectors_b[..., 1] - vectors_a[..., 1] * vectors_b[..., 0]
+
+
+def clip_parameters(offsets, slopes, bounds, t_from=0.0, t_to=1.0):
+    # interval of t within [t_from, t_to] where offsets + t * slopes <= bounds holds for every constraint (first axis),
+    # empty intervals end before they start
+    for offset, slope, bound in zip(offsets, slopes, bounds):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = (bound - offset) / slope
+        t_from = np.where(slope < 0.0, np.maximum(t_from, ratio), t_from)
+        blocked = (slope == 0.0) & (offset > bound)
+        t_to = np.where(slope > 0.0, np.minimum(t_to, ratio), np.where(blocked, -np.inf, t_to))
+    return t_from, t_to
+
+
+def box_parameters(starts, directions, d_region):
+    (left, right), (bottom, top) = d_region
+    offsets = [-starts[:, 0], starts[:, 0], -starts[:, 1], starts[:, 1]]
+    slopes = [-directions[:, 0], directions[:, 0], -directions[:, 1], directions[:, 1]]
+    return clip_parameters(offsets, slopes, [-left, right, -bottom, top])
+
+
+def merge_parameters(keys, t_from, t_to):
+    # disjoint pieces of the union of [t_from, t_to] intervals (within [0, 1]) grouped by integer keys
+    pieces = t_to > t_from
+    keys, t_from, t_to = keys[pieces], t_from[pieces], t_to[pieces]
+    shift = 2.0 * keys
+
+    order = np.argsort(t_from + shift)
+    keys, t_from, t_to, shift = keys[order], t_from[order], t_to[order], shift[order]
+    reached = np.maximum.accumulate(t_to + shift)
+    previous = np.concatenate([[-np.inf], reached[:-1]]) - shift
+    t_from = np.maximum(t_from, previous)
+
+    pieces = t_to > t_from
+    return keys[pieces], t_from[pieces], t_to[pieces]
 
 
 class WedgesCropper:
     def __init__(self, d_region, arc_pts_count=10):
-        (left, right), (bottom, top) = d_region
-        self.region = box(minx=left, miny=bottom, maxx=right, maxy=top)
+        self.d_region = d_region
+        self.region = region_box(d_region)
         self.num_pts = arc_pts_count
 
     def approximate_wedge(self, wedge_center, wedge_radii, wedge_rays):
@@ -35,6 +99,273 @@ class WedgesCropper:
             from_min, from_max, *arc_max, to_max, to_min, *arc_min
         ])
 
+    def arc_vectors(self, wedges_rays):
+        wedges_rays = np.asarray(wedges_rays, dtype=np.float64)
+        angles = np.arctan2(wedges_rays[..., 1], wedges_rays[..., 0])
+        arc_angles = np.linspace(start=angles[:, 0], stop=angles[:, 1], num=self.num_pts, axis=1)
+        arc_vectors = np.stack([np.cos(arc_angles), np.sin(arc_angles)], axis=-1)
+        arc_vectors[:, 0] = wedges_rays[:, 0]
+        arc_vectors[:, -1] = wedges_rays[:, 1]
+        return arc_vectors
+
+    def approximate_wedges(self, wedges_centers, wedges_radii, wedges_rays):
+        wedges_centers = np.asarray(wedges_centers, dtype=np.float64)
+        wedges_radii = np.asarray(wedges_radii, dtype=np.float64)
+        arc_vectors = self.arc_vectors(wedges_rays)
+
+        radius_min, radius_max = wedges_radii[:, None, None, 0], wedges_radii[:, None, None, 1]
+        arc_min = wedges_centers[:, None] + radius_min * np.flip(arc_vectors, axis=1)
+        arc_max = wedges_centers[:, None] + radius_max * arc_vectors
+        return np.concatenate([arc_min[:, -1:], arc_max, arc_min[:, :-1]], axis=1)
+
+    def wedges_fans(self, wedges_rays):
+        # a wedge polygon is its outer convex fan (two rays and outer chords) without its inner convex fan
+        arc_vectors = self.arc_vectors(wedges_rays)
+        chords = arc_vectors[:, 1:] - arc_vectors[:, :-1]
+        normals = np.stack([chords[..., 1], -chords[..., 0]], axis=-1)
+        reaches = np.sum(normals * arc_vectors[:, :-1], axis=-1)
+        normals *= np.where(reaches < 0.0, -1.0, 1.0)[..., None]
+        reaches = np.abs(reaches)
+        orientation = np.where(cross_2d(arc_vectors[:, 0], arc_vectors[:, -1]) < 0.0, -1.0, 1.0)
+        return arc_vectors, normals, reaches, orientation
+
+    @staticmethod
+    def __cone_parameters(shifts, directions, rays_from, rays_to, orientation):
+        offsets = [-orientation * cross_2d(rays_from, shifts), -orientation * cross_2d(shifts, rays_to)]
+        slopes = [-orientation * cross_2d(rays_from, directions), -orientation * cross_2d(directions, rays_to)]
+        return clip_parameters(offsets, slopes, [0.0, 0.0])
+
+    def __covered_parameters(self, starts, directions, segments_cameras, wedges_centers, wedges_radii,
+                             wedges_cameras, fans):
+        # parameter intervals of segments inside the wedges of other cameras, candidates are looked up
+        # by the sector cone and the radial range of the segment around every camera
+        arc_vectors, normals, reaches, orientation = fans
+        keys, covered_from, covered_to = [], [], []
+
+        for idx_cam in np.unique(wedges_cameras):
+            cam_wedges = np.flatnonzero(wedges_cameras == idx_cam)
+            center = wedges_centers[cam_wedges[0]]
+            reference = arc_vectors[cam_wedges[0], 0]
+
+            def relative_angles(vectors):
+                return np.arctan2(cross_2d(reference, vectors), np.sum(reference * vectors, axis=-1))
+
+            angles_from = relative_angles(arc_vectors[cam_wedges, 0])
+            angles_to = relative_angles(arc_vectors[cam_wedges, -1])
+            angles_low = np.minimum(angles_from, angles_to)
+            angle_base = np.min(angles_low)
+
+            sectors_low, sectors_first, sectors_rank = np.unique(angles_low, return_index=True, return_inverse=True)
+            sectors_high = np.maximum(angles_from, angles_to)[sectors_first] - angle_base
+            sectors_low = sectors_low - angle_base
+            sectors_wedges = cam_wedges[sectors_first]
+
+            # wedges of one sector are disjoint radial intervals, ordered keys give candidate ranges
+            cam_normals = np.linalg.norm(normals[cam_wedges], axis=-1)
+            chord_distances = np.divide(
+                reaches[cam_wedges], cam_normals, out=np.ones_like(cam_normals), where=cam_normals > 0.0
+            )
+            radii_min = wedges_radii[cam_wedges, 0] * np.min(chord_distances, axis=-1)
+            radii_max = wedges_radii[cam_wedges, 1]
+            scale = 2.0 * np.max(radii_max) + 2.0
+            order = np.lexsort((radii_max, sectors_rank))
+            cam_wedges = cam_wedges[order]
+            keys_min = sectors_rank[order] * scale + radii_min[order]
+            keys_max = sectors_rank[order] * scale + radii_max[order]
+
+            cam_segments = np.flatnonzero(segments_cameras != idx_cam)
+            shifts = starts[cam_segments] - center
+            shifts_to = shifts + directions[cam_segments]
+            distances = np.maximum(np.linalg.norm(shifts, axis=-1), np.linalg.norm(shifts_to, axis=-1))
+
+            span_from = np.mod(relative_angles(shifts) - angle_base + np.pi, 2.0 * np.pi) - np.pi
+            span_to = np.mod(relative_angles(shifts_to) - angle_base + np.pi, 2.0 * np.pi) - np.pi
+            wrapped = np.abs(span_to - span_from) > np.pi
+            span_low = np.where(wrapped, np.maximum(span_from, span_to), np.minimum(span_from, span_to))
+            span_high = np.where(wrapped, np.minimum(span_from, span_to) + 2.0 * np.pi, np.maximum(span_from, span_to))
+
+            # a segment passing through the camera center may be seen under any angle
+            through_center = np.abs(cross_2d(shifts, shifts_to)) <= PARALLEL_TOLERANCE * distances ** 2
+            span_low = np.where(through_center, -np.inf, span_low)
+            span_high = np.where(through_center, np.inf, span_high)
+
+            sector_start = np.searchsorted(sectors_high, span_low, side='left')
+            sector_counts = np.maximum(np.searchsorted(sectors_low, span_high, side='right') - sector_start, 0)
+            pair_segments = np.repeat(np.arange(len(cam_segments)), sector_counts)
+            pair_sectors = np.repeat(sector_start - np.cumsum(sector_counts) + sector_counts, sector_counts)
+            pair_sectors += np.arange(len(pair_segments))
+
+            pair_shifts, pair_directions = shifts[pair_segments], directions[cam_segments[pair_segments]]
+            sector_wedges = sectors_wedges[pair_sectors]
+            cone_from, cone_to = self.__cone_parameters(
+                pair_shifts, pair_directions, arc_vectors[sector_wedges, 0], arc_vectors[sector_wedges, -1],
+                orientation[sector_wedges]
+            )
+            in_cone = cone_to > cone_from
+            pair_segments, pair_sectors = pair_segments[in_cone], pair_sectors[in_cone]
+            pair_shifts, pair_directions = pair_shifts[in_cone], pair_directions[in_cone]
+            cone_from, cone_to = cone_from[in_cone], cone_to[in_cone]
+
+            lengths = np.sum(pair_directions ** 2, axis=-1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                closest = -np.sum(pair_shifts * pair_directions, axis=-1) / lengths
+            closest = np.clip(np.where(lengths > 0.0, closest, cone_from), cone_from, cone_to)
+            distance_low = np.linalg.norm(pair_shifts + closest[:, None] * pair_directions, axis=-1)
+            distance_high = np.maximum(
+                np.linalg.norm(pair_shifts + cone_from[:, None] * pair_directions, axis=-1),
+                np.linalg.norm(pair_shifts + cone_to[:, None] * pair_directions, axis=-1)
+            )
+
+            # wedges of one sector share chord normals, each chord bounds t linearly in the wedge radius:
+            # normal * (shift + t * direction) <= radius * reach  <=>  t >= or <= radius * slope + offset
+            sector_wedges = sectors_wedges[pair_sectors]
+            chord_normals = normals[sector_wedges]
+            chord_shifts = np.einsum('pck,pk->cp', chord_normals, pair_shifts)
+            chord_directions = np.einsum('pck,pk->cp', chord_normals, pair_directions)
+            chord_directions = np.where(chord_directions == 0.0, -np.finfo(np.float64).tiny, chord_directions)
+            with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+                radius_slopes = reaches[sector_wedges].T / chord_directions
+                radius_offsets = -chord_shifts / chord_directions
+            is_lower = chord_directions < 0.0
+            slopes_lower = np.where(is_lower, radius_slopes, 0.0)
+            offsets_lower = np.where(is_lower, radius_offsets, -np.inf)
+            slopes_upper = np.where(is_lower, 0.0, radius_slopes)
+            offsets_upper = np.where(is_lower, np.inf, radius_offsets)
+
+            wedges_start = np.searchsorted(
+                keys_max, pair_sectors * scale + np.minimum(distance_low, scale / 2.0), side='left'
+            )
+            wedges_counts = np.maximum(np.searchsorted(
+                keys_min, pair_sectors * scale + np.minimum(distance_high, scale / 2.0), side='right'
+            ) - wedges_start, 0)
+            pair_wedges = np.repeat(wedges_start - np.cumsum(wedges_counts) + wedges_counts, wedges_counts)
+            pair_wedges = cam_wedges[pair_wedges + np.arange(len(pair_wedges))]
+
+            radius_min, radius_max = wedges_radii[pair_wedges, 0], wedges_radii[pair_wedges, 1]
+            outer_from = inner_from = np.repeat(cone_from, wedges_counts)
+            outer_to = inner_to = np.repeat(cone_to, wedges_counts)
+
+            with np.errstate(invalid='ignore'):
+                for slope_lower, offset_lower, slope_upper, offset_upper in zip(
+                        np.repeat(slopes_lower, wedges_counts, axis=1),
+                        np.repeat(offsets_lower, wedges_counts, axis=1),
+                        np.repeat(slopes_upper, wedges_counts, axis=1),
+                        np.repeat(offsets_upper, wedges_counts, axis=1)):
+                    outer_from = np.maximum(outer_from, radius_max * slope_lower + offset_lower)
+                    outer_to = np.minimum(outer_to, radius_max * slope_upper + offset_upper)
+                    inner_from = np.maximum(inner_from, radius_min * slope_lower + offset_lower)
+                    inner_to = np.minimum(inner_to, radius_min * slope_upper + offset_upper)
+
+            has_inner = inner_to > inner_from
+            pair_keys = np.repeat(cam_segments[pair_segments], wedges_counts)
+            keys.extend([pair_keys, pair_keys])
+            covered_from.extend([outer_from, np.where(has_inner, np.maximum(outer_from, inner_to), outer_to)])
+            covered_to.extend([np.where(has_inner, np.minimum(outer_to, inner_from), outer_to), outer_to])
+
+        if len(keys) == 0:
+            return np.zeros(shape=0, dtype=np.int64), np.zeros(shape=0), np.zeros(shape=0)
+        return merge_parameters(np.concatenate(keys), np.concatenate(covered_from), np.concatenate(covered_to))
+
+    def union_areas(self, wedges_centers, wedges_radii, wedges_rays, wedges_cameras, d_regions):
+        # Green's theorem over the union boundary: wedge edges outside the wedges of other cameras
+        # (edges shared by wedges of one camera cancel out) plus the covered parts of the region box sides
+        if len(wedges_centers) == 0:
+            return [0.0 for _ in d_regions]
+
+        wedges_centers = np.asarray(wedges_centers, dtype=np.float64)
+        wedges_radii = np.asarray(wedges_radii, dtype=np.float64)
+        wedges_cameras = np.asarray(wedges_cameras)
+        fans = self.wedges_fans(wedges_rays)
+        orientation = fans[3]
+
+        vertices = self.approximate_wedges(wedges_centers, wedges_radii, wedges_rays)
+        edges_wedges = np.repeat(np.arange(len(vertices)), vertices.shape[1])
+        edges_from = vertices.reshape(-1, 2)
+        edges_directions = np.roll(vertices, -1, axis=1).reshape(-1, 2) - edges_from
+
+        reach_from, reach_to = box_parameters(edges_from, edges_directions, regions_envelope(d_regions))
+        in_regions = reach_to > reach_from
+        edges_wedges, edges_from, edges_directions = \
+            edges_wedges[in_regions], edges_from[in_regions], edges_directions[in_regions]
+
+        # right and top sides of every region box, the other two sides pass through its corner origin
+        sides_from, sides_directions = [], []
+        for (left, right), (bottom, top) in d_regions:
+            sides_from.extend([[right, bottom], [right, top]])
+            sides_directions.extend([[0.0, top - bottom], [left - right, 0.0]])
+
+        edges_count = len(edges_from)
+        covered_keys, covered_from, covered_to = self.__covered_parameters(
+            np.concatenate([edges_from, np.asarray(sides_from, dtype=np.float64)]),
+            np.concatenate([edges_directions, np.asarray(sides_directions, dtype=np.float64)]),
+            np.concatenate([wedges_cameras[edges_wedges], np.full(2 * len(d_regions), -1)]),
+            wedges_centers, wedges_radii, wedges_cameras, fans
+        )
+        on_edges = covered_keys < edges_count
+        sides_covered = np.bincount(
+            covered_keys[~on_edges] - edges_count, weights=(covered_to - covered_from)[~on_edges],
+            minlength=2 * len(d_regions)
+        )
+        covered_keys, covered_from, covered_to = \
+            covered_keys[on_edges], covered_from[on_edges], covered_to[on_edges]
+
+        areas = []
+        for idx_region, ((left, right), (bottom, top)) in enumerate(d_regions):
+            inside_from, inside_to = box_parameters(edges_from, edges_directions, ((left, right), (bottom, top)))
+            hidden = np.maximum(
+                np.minimum(covered_to, inside_to[covered_keys])
+                - np.maximum(covered_from, inside_from[covered_keys]), 0.0
+            )
+            visible = np.maximum(inside_to - inside_from, 0.0) - np.bincount(
+                covered_keys, weights=hidden, minlength=edges_count
+            )
+
+            origin = np.asarray([left, bottom], dtype=np.float64)
+            edges_area = 0.5 * np.sum(
+                orientation[edges_wedges] * cross_2d(edges_from - origin, edges_directions) * visible
+            )
+            sides_covered_region = np.sum(sides_covered[2 * idx_region:2 * idx_region + 2])
+            sides_area = 0.5 * (right - left) * (top - bottom) * sides_covered_region
+            areas.append(float(edges_area + sides_area))
+        return areas
+
+    def union_area(self, wedges_centers, wedges_radii, wedges_rays, wedges_cameras):
+        return self.union_areas(wedges_centers, wedges_radii, wedges_rays, wedges_cameras, [self.d_region])[0]
+
+    def crop_wedges(self, wedges_centers, wedges_radii, wedges_rays):
+        if len(wedges_centers) == 0:
+            return {
+                PolyData.POINTS: np.zeros(shape=(0, 2)),
+                PolyData.OFFSETS: np.zeros(shape=1, dtype=np.int64),
+                PolyData.INDICES: np.zeros(shape=0, dtype=np.int64),
+                PolyData.AREAS: np.zeros(shape=0),
+                PolyData.POLYGONS: np.zeros(shape=0, dtype=object),
+                PolyData.AREA: 0.0
+            }
+
+        wedges_points = self.approximate_wedges(wedges_centers, wedges_radii, wedges_rays)
+        wedges_polys = shapely.polygons(wedges_points)
+        cropped_polys = shapely.intersection(wedges_polys, self.region)
+        cropped_areas = shapely.area(cropped_polys)
+
+        parts, parts_indices = shapely.get_parts(cropped_polys, return_index=True)
+        is_polygon = (shapely.get_type_id(parts) == shapely.GeometryType.POLYGON) & ~shapely.is_empty(parts)
+        parts, parts_indices = parts[is_polygon], parts_indices[is_polygon]
+
+        rings = shapely.get_exterior_ring(parts)
+        cropped_points, rings_indices = shapely.get_coordinates(rings, return_index=True)
+        rings_sizes = np.bincount(rings_indices, minlength=len(rings))
+        offsets = np.concatenate([[0], np.cumsum(rings_sizes)])
+
+        return {
+            PolyData.POINTS: cropped_points,
+            PolyData.OFFSETS: offsets,
+            PolyData.INDICES: parts_indices,
+            PolyData.AREAS: cropped_areas,
+            PolyData.POLYGONS: cropped_polys,
+            PolyData.AREA: float(np.sum(cropped_areas))
+        }
+
     def crop_wedge(self, wedge_center, wedge_radii, wedge_rays):
         wedge_points = self.approximate_wedge(wedge_center, wedge_radii, wedge_rays)
         wedge_poly = Polygon(wedge_points)